@@ -1,11 +1,15 @@
 import os
+import time
+import hashlib
 import firebase_admin
 from firebase_admin import credentials, auth
 from firebase_admin.auth import InvalidIdTokenError
 from fastapi import HTTPException, Depends, Header
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional, Dict
 from dotenv import load_dotenv
 import requests
+from utils.cache import TTLCache
 
 # Load environment variables
 load_dotenv()
@@ -69,29 +73,33 @@ def initialize_firebase():
 # Initialize Firebase when module is imported
 initialize_firebase()
 
+# Verified claims keyed by a hash of the ID token. Clients reuse a token for
+# up to an hour, so most requests skip signature verification entirely.
+# Google's signing certs are already cached by firebase_admin, which honours
+# the Cache-Control max-age of the cert endpoint.
+_token_cache = TTLCache(maxsize=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000")))
 
-async def get_current_user(authorization: Optional[str] = Header(None)) -> str:
-    if authorization is None or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid authentication credentials",
-        )
 
-    token = authorization.replace("Bearer ", "")
+async def verify_token(token: str) -> Dict:
+    """Verify a Firebase ID token, reusing claims already verified for the same token"""
+    key = hashlib.sha256(token.encode()).hexdigest()
+    decoded_token = _token_cache.get(key)
+    if decoded_token is not None:
+        return decoded_token
 
-    try:
-        # Verify Firebase ID token
-        decoded_token = auth.verify_id_token(token)
-        user_id = decoded_token['uid']
-        return user_id
-    except InvalidIdTokenError:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid authentication token",
-        )
-    
+    # RSA verification (and the occasional cert fetch) is blocking work
+    decoded_token = await run_in_threadpool(auth.verify_id_token, token)
+    # Never serve claims past the token's own expiry
+    _token_cache.set(key, decoded_token, ttl=decoded_token.get("exp", 0) - time.time())
+    return decoded_token
+
+
+async def get_token_claims(authorization: Optional[str] = Header(None)) -> Dict:
+    """Decoded claims for the request's bearer token.
 
-async def get_current_user_with_username(authorization: Optional[str] = Header(None)) -> Dict[str, str]:
+    FastAPI caches dependencies per request, so every auth dependency below
+    shares this one verified claims object.
+    """
     if authorization is None or not authorization.startswith("Bearer "):
         raise HTTPException(
             status_code=401,
@@ -101,11 +109,7 @@ async def get_current_user_with_username(authorization: Optional[str] = Header(N
     token = authorization.replace("Bearer ", "")
 
     try:
-        # Verify Firebase ID token
-        decoded_token = auth.verify_id_token(token)
-        user_id = decoded_token['uid']
-        email = decoded_token.get('name', '')
-        return {"uid": user_id, "name": email}
+        return await verify_token(token)
     except InvalidIdTokenError:
         raise HTTPException(
             status_code=401,
@@ -113,26 +117,20 @@ async def get_current_user_with_username(authorization: Optional[str] = Header(N
         )
 
 
-async def get_current_user_with_email(authorization: Optional[str] = Header(None)) -> Dict[str, str]:
-    if authorization is None or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid authentication credentials",
-        )
+async def get_current_user(decoded_token: Dict = Depends(get_token_claims)) -> str:
+    return decoded_token['uid']
+    
 
-    token = authorization.replace("Bearer ", "")
+async def get_current_user_with_username(decoded_token: Dict = Depends(get_token_claims)) -> Dict[str, str]:
+    user_id = decoded_token['uid']
+    email = decoded_token.get('name', '')
+    return {"uid": user_id, "name": email}
 
-    try:
-        # Verify Firebase ID token
-        decoded_token = auth.verify_id_token(token)
-        user_id = decoded_token['uid']
-        email = decoded_token.get('email', '')
-        return {"user_id": user_id, "email": email}
-    except InvalidIdTokenError:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid authentication token",
-        )
+
+async def get_current_user_with_email(decoded_token: Dict = Depends(get_token_claims)) -> Dict[str, str]:
+    user_id = decoded_token['uid']
+    email = decoded_token.get('email', '')
+    return {"user_id": user_id, "email": email}
 
 
 async def get_google_user_info(access_token: str) -> Dict[str, str]:
@@ -150,54 +148,50 @@ async def get_google_user_info(access_token: str) -> Dict[str, str]:
         return {}
 
 
-async def get_current_user_auto_register(authorization: Optional[str] = Header(None)) -> Dict[str, str]:
-    """Get current user and auto-register if new user"""
-    if authorization is None or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid authentication credentials",
-        )
+async def get_current_user_auto_register(decoded_token: Dict = Depends(get_token_claims)) -> Dict:
+    """Get current user and auto-register if new user.
 
-    token = authorization.replace("Bearer ", "")
-
-    try:
-        # Verify Firebase ID token
-        decoded_token = auth.verify_id_token(token)
-        user_id = decoded_token['uid']
-        email = decoded_token.get('email', '')
-        name = decoded_token.get('name', '')
-        
-        # Import here to avoid circular imports
-        from config.database import profile_collection
-        
-        # Check if user profile exists
-        existing_profile = profile_collection.find_one({"user_id": user_id})
-        
-        if not existing_profile:
-            # Auto-create profile for new user
-            profile_dict = {
-                "user_id": user_id,
-                "email": email,
-                "name": name or email.split('@')[0],  # Use email prefix if no name
-                "age": None,
-                "address": None,
-                "gender": None,
-                "phone": None,
-                "date_of_birth": None,
-                "blood_type": None,
-                "allergies": None,
-                "medical_conditions": None,
-                "emergency_contact": None
-            }
-            
-            # Insert new profile
-            profile_collection.insert_one(profile_dict)
-            print(f"✅ Auto-created profile for new user: {email}")
-        
-        return {"user_id": user_id, "email": email, "name": name}
-        
-    except InvalidIdTokenError:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid authentication token",
-        )
+    Returns the caller's claims plus their profile document under "profile",
+    so the login handler needs no second read.
+    """
+    user_id = decoded_token['uid']
+    email = decoded_token.get('email', '')
+    name = decoded_token.get('name', '')
+    
+    # Import here to avoid circular imports
+    from pymongo import ReturnDocument
+    from pymongo.errors import DuplicateKeyError
+    from config import repository as repo
+    from utils import profile_cache
+    
+    # Returning users are usually cached; otherwise one upsert both finds the
+    # profile and creates it, atomically, for new users
+    profile = profile_cache.get_profile_if_cached(user_id)
+    if profile is None:
+        new_profile = {
+            "user_id": user_id,
+            "email": email,
+            "name": name or email.split('@')[0],  # Use email prefix if no name
+            "age": None,
+            "address": None,
+            "gender": None,
+            "phone": None,
+            "date_of_birth": None,
+            "blood_type": None,
+            "allergies": None,
+            "medical_conditions": None,
+            "emergency_contact": None
+        }
+        try:
+            profile = await repo.profiles.find_one_and_update(
+                {"user_id": user_id},
+                {"$setOnInsert": new_profile},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # A concurrent login inserted it first; the unique index kept one copy
+            profile = await repo.profiles.find_one({"user_id": user_id})
+        profile_cache.store(profile)
+    
+    return {"user_id": user_id, "email": email, "name": name, "profile": profile}
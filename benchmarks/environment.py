@@ -0,0 +1,87 @@
+"""Point the app at a local database and local auth before it is imported."""
+import copy
+import os
+import tempfile
+import threading
+import time
+from benchmarks import local_auth
+
+BENCH_DATABASE = "DrugScriptBench"
+
+# mongomock Collection methods -> the MongoDB command each one sends
+MONGOMOCK_COMMANDS = {
+    "find": "find", "find_one": "find", "aggregate": "aggregate", "count_documents": "aggregate",
+    "estimated_document_count": "count", "distinct": "distinct",
+    "insert_one": "insert", "insert_many": "insert",
+    "update_one": "update", "update_many": "update", "replace_one": "update",
+    "delete_one": "delete", "delete_many": "delete", "bulk_write": "bulkWrite",
+    "find_one_and_update": "findAndModify", "find_one_and_delete": "findAndModify",
+    "find_one_and_replace": "findAndModify",
+}
+
+
+def _record_mongomock_commands(collection_class) -> None:
+    """Feed mongomock calls into the per-request stats the pymongo listener fills.
+
+    mongomock emits no command monitoring events, so without this every
+    response would report X-DB-Queries: 0. One public call counts as one
+    command; calls mongomock makes internally (find_one -> find) do not.
+    """
+    from utils import metrics
+
+    if getattr(collection_class.find, "records_commands", False):
+        return  # prepare() already ran in this process
+    depth = threading.local()
+
+    def recorded(method, command):
+        def wrapper(self, *args, **kwargs):
+            outermost = not getattr(depth, "value", 0)
+            depth.value = getattr(depth, "value", 0) + 1
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                depth.value -= 1
+                stats = metrics.current_request.get()
+                if outermost and stats is not None:
+                    stats.record((time.perf_counter() - started) * 1000, command, self.name)
+        wrapper.records_commands = True
+        return wrapper
+
+    for name, command in MONGOMOCK_COMMANDS.items():
+        setattr(collection_class, name, recorded(getattr(collection_class, name), command))
+
+
+def prepare(backend: str = "mongomock", uri: str = "mongodb://localhost:27017", database: str = BENCH_DATABASE) -> None:
+    """Configure env vars and stubs; call before importing main or config.database"""
+    os.environ["MONGODB_DATABASE"] = database
+    os.environ.setdefault("BLOB_STORE_BACKEND", "filesystem")
+    os.environ.setdefault("BLOB_STORE_PATH", tempfile.mkdtemp(prefix="drugscript-bench-blobs-"))
+
+    if backend == "mongomock":
+        import mongomock
+        import pymongo
+        from mongomock.collection import Collection
+
+        # mongomock rewrites projection dicts in place, which races when the
+        # app's module-level projections are shared across worker threads;
+        # pymongo never mutates them, so hand mongomock private copies
+        find, aggregate = Collection.find, Collection.aggregate
+        Collection.find = lambda self, filter=None, projection=None, *args, **kwargs: find(
+            self, filter, copy.deepcopy(projection), *args, **kwargs
+        )
+        Collection.aggregate = lambda self, pipeline, *args, **kwargs: aggregate(
+            self, copy.deepcopy(pipeline), *args, **kwargs
+        )
+        _record_mongomock_commands(Collection)
+
+        # One in-memory server shared by the app and the seeder
+        shared = mongomock.MongoClient()
+        pymongo.MongoClient = lambda *args, **kwargs: shared
+        os.environ["MONGODB_URI"] = "mongodb://mongomock"
+    elif backend == "mongod":
+        os.environ["MONGODB_URI"] = uri
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    local_auth.install()
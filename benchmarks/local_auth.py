@@ -0,0 +1,58 @@
+"""Local stand-in for Firebase ID tokens, for benchmarks only.
+
+install() must run before anything imports auth.firebase_auth: it turns the
+import-time Firebase initialization into a no-op and swaps
+firebase_admin.auth.verify_id_token for an HMAC check of tokens made by
+sign(). Nothing here is imported by the application itself.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from typing import Dict
+
+SECRET = os.getenv("BENCH_AUTH_SECRET", "drugscript-benchmark").encode()
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def sign(uid: str, name: str = "", ttl: float = 3600) -> str:
+    """Mint a token carrying the claims the app reads from Firebase tokens"""
+    claims = {"uid": uid, "email": f"{uid}@bench.local", "name": name or uid, "exp": time.time() + ttl}
+    payload = _b64(json.dumps(claims).encode())
+    signature = _b64(hmac.new(SECRET, payload.encode(), hashlib.sha256).digest())
+    return f"{payload}.{signature}"
+
+
+def verify(token: str, *args, **kwargs) -> Dict:
+    from firebase_admin import auth
+
+    payload, _, signature = token.partition(".")
+    expected = _b64(hmac.new(SECRET, payload.encode(), hashlib.sha256).digest())
+    if not hmac.compare_digest(signature, expected):
+        raise auth.InvalidIdTokenError("Bad benchmark token signature")
+    claims = json.loads(_unb64(payload))
+    if claims["exp"] < time.time():
+        raise auth.InvalidIdTokenError("Benchmark token expired")
+    return claims
+
+
+def install() -> None:
+    import firebase_admin
+    from firebase_admin import auth, credentials
+
+    os.environ.pop("RAILWAY_ENVIRONMENT", None)
+    os.environ.pop("RAILWAY_PROJECT_ID", None)
+    # initialize_firebase() only checks that the credentials file exists
+    os.environ["FIREBASE_CREDENTIALS_PATH"] = __file__
+    credentials.Certificate = lambda *args, **kwargs: None
+    firebase_admin.initialize_app = lambda *args, **kwargs: None
+    auth.verify_id_token = verify
@@ -0,0 +1,244 @@
+"""Concurrent load test for every router, against a local database with local auth.
+
+Usage:
+    pip install -r requirements.txt -r benchmarks/requirements.txt
+    python -m benchmarks.run                                   # in-process app, mongomock
+    python -m benchmarks.run --backend mongod --uri mongodb://localhost:27017
+    python -m benchmarks.run --requests 20000 --concurrency 64 --save baseline
+    python -m benchmarks.run --compare benchmarks/baselines/baseline.json
+
+The database (DrugScriptBench by default, never the app's own) is reseeded
+by benchmarks/seed.py, Firebase verification is replaced by
+benchmarks/local_auth.py, and the app runs in-process (httpx ASGI transport,
+no sockets) with its startup hooks, so numbers reflect the app and the
+database rather than the network.
+
+Reports req/s and p50/p95/p99 per endpoint; --save writes the numbers to
+benchmarks/baselines/<name>.json and --compare diffs a run against one.
+Deletes are not exercised so the data set stays stable across a run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+Request = Tuple[str, str, str, Dict[str, Any]]  # (endpoint label, method, url, httpx kwargs)
+
+
+def build_scenarios(fixtures: Dict[str, List[Any]], tokens: Dict[str, str]) -> List[Tuple[int, Callable[[random.Random], Request]]]:
+    """(weight, request factory) pairs; weights roughly follow app traffic"""
+    users = fixtures["user_ids"]
+    slugs = fixtures["slugs"]
+    names = fixtures["medicine_names"]
+    prescriptions = fixtures["prescriptions"]
+
+    def auth(rng, uid=None):
+        return {"Authorization": f"Bearer {tokens[uid or rng.choice(users)]}"}
+
+    def prefix(rng, size):
+        return rng.choice(names).lower()[:size]
+
+    def typo(rng):
+        # A typed prefix with two neighbouring letters swapped
+        text = prefix(rng, 8)
+        i = rng.randrange(max(1, len(text) - 1))
+        return text[:i] + text[i + 1:i + 2] + text[i:i + 1] + text[i + 2:]
+
+    def own_prescription(rng, suffix=""):
+        pid, owner = rng.choice(prescriptions)
+        return f"/prescription/{pid}{suffix}", {"headers": auth(rng, owner)}
+
+    return [
+        (12, lambda rng: ("POST /medicinesearch", "POST", "/medicinesearch", {"json": {"query": prefix(rng, rng.randint(1, 6))}})),
+        (2, lambda rng: ("POST /medicinesearch fuzzy", "POST", "/medicinesearch", {"json": {"query": typo(rng), "fuzzy": True}})),
+        (12, lambda rng: ("GET /medicines/autocomplete", "GET", "/medicines/autocomplete", {"params": {"prefix": prefix(rng, rng.randint(1, 5))}})),
+        (8, lambda rng: ("GET /medicine/{slug}", "GET", f"/medicine/{rng.choice(slugs)}", {})),
+        (3, lambda rng: ("GET /medicine/{slug}/alternatives", "GET", f"/medicine/{rng.choice(slugs)}/alternatives", {})),
+        (3, lambda rng: ("POST /medicines/batch", "POST", "/medicines/batch", {"json": {"slugs": rng.sample(slugs, 10)}})),
+        (4, lambda rng: ("POST /profile/auth-login", "POST", "/profile/auth-login", {"headers": auth(rng)})),
+        (4, lambda rng: ("GET /profile", "GET", "/profile", {"headers": auth(rng)})),
+        (2, lambda rng: ("GET /profile/public/{uid}", "GET", f"/profile/public/{rng.choice(users)}", {})),
+        (1, lambda rng: ("PUT /profile", "PUT", "/profile", {"json": {"phone": f"01{rng.randint(100000000, 999999999)}"}, "headers": auth(rng)})),
+        (5, lambda rng: ("GET /prescriptions", "GET", "/prescriptions", {"params": {"limit": 20}, "headers": auth(rng)})),
+        (4, lambda rng: ("GET /prescription/{id}", "GET", *own_prescription(rng))),
+        (2, lambda rng: ("GET /prescription/{id}/image", "GET", *own_prescription(rng, "/image"))),
+        (1, lambda rng: ("POST /add_prescription", "POST", "/add_prescription", {"json": {
+            "doctor_name": "Dr Bench", "contact": "01700000000", "date": "01-01-2025", "diagnosis": "load test",
+            "medicines": [{"slug": rng.choice(slugs)}], "image": fixtures["image"], "created_by": "bench",
+        }, "headers": auth(rng)})),
+        (3, lambda rng: ("GET /recievedPrescription", "GET", "/recievedPrescription", {"headers": auth(rng)})),
+        (3, lambda rng: ("GET /sentPrescriptions", "GET", "/sentPrescriptions", {"headers": auth(rng)})),
+        (1, lambda rng: ("POST /recievedPrescription", "POST", "/recievedPrescription", {"json": {"prescription_id": rng.choice(prescriptions)[0]}, "headers": auth(rng)})),
+        (3, lambda rng: ("GET /messages/", "GET", "/messages/", {"params": {"limit": 50}})),
+        (1, lambda rng: ("POST /messages/", "POST", "/messages/", {"json": {"sender_id": rng.choice(users), "content": "hello"}})),
+        (3, lambda rng: ("GET /clinics", "GET", "/clinics", {"headers": {**auth(rng), "Accept-Encoding": "gzip"}})),
+        (2, lambda rng: ("GET /clinics/_search", "GET", "/clinics/_search", {"params": {"q": prefix(rng, 3)}, "headers": auth(rng)})),
+        (3, lambda rng: ("GET /reviews", "GET", "/reviews", {"params": {"subject_id": rng.choice(fixtures["doctor_ids"]), "is_doctor": "true", "limit": 20}, "headers": auth(rng)})),
+        (1, lambda rng: ("POST /reviews", "POST", "/reviews", {"json": {
+            "subject_id": rng.choice(fixtures["doctor_ids"]), "displayName": "Dr Bench", "is_doctor": True,
+            "rating": rng.randint(1, 5), "review": "load test",
+        }, "headers": auth(rng)})),
+        (2, lambda rng: ("GET /doctors/top", "GET", "/doctors/top", {"params": {"limit": 10}, "headers": auth(rng)})),
+        (2, lambda rng: ("GET /clinics/top", "GET", "/clinics/top", {"params": {"limit": 10}, "headers": auth(rng)})),
+    ]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def drive(client, scenarios, total: int, concurrency: int, seed: int) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    """Run `total` requests from `concurrency` workers; returns latencies, error counts and wall time"""
+    weights = [weight for weight, _ in scenarios]
+    factories = [factory for _, factory in scenarios]
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    remaining = [total]
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            label, method, url, kwargs = rng.choices(factories, weights)[0](rng)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                failed = response.status_code >= 400
+            except Exception as e:
+                print(f"❌ {label}: {e!r}")
+                failed = True
+            latencies.setdefault(label, []).append((time.perf_counter() - started) * 1000)
+            if failed:
+                errors[label] = errors.get(label, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, int], wall: float) -> Dict[str, Dict[str, float]]:
+    results = {}
+    everything = [ms for samples in latencies.values() for ms in samples]
+    for label, samples in sorted(latencies.items()) + [("ALL", everything)]:
+        results[label] = {
+            "requests": len(samples),
+            "errors": errors.get(label, 0) if label != "ALL" else sum(errors.values()),
+            "rps": round(len(samples) / wall, 1),
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+        }
+    return results
+
+
+def print_table(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+    header = f"{'endpoint':<36} {'reqs':>6} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    print(header + ("   p95 vs baseline" if baseline else ""))
+    print("-" * len(header))
+    for label, r in results.items():
+        line = f"{label:<36} {r['requests']:>6} {r['errors']:>5} {r['rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}"
+        if baseline and label in baseline and baseline[label]["p95_ms"]:
+            line += f"   {(r['p95_ms'] / baseline[label]['p95_ms'] - 1) * 100:+6.1f}%"
+        print(line)
+
+
+def regressions(results, baseline, tolerance: float) -> List[str]:
+    """Endpoints whose p95 grew by more than `tolerance` (a fraction) over the baseline"""
+    return [
+        label for label, r in results.items()
+        if label in baseline and baseline[label]["p95_ms"] and r["p95_ms"] > baseline[label]["p95_ms"] * (1 + tolerance)
+    ]
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+async def main(args) -> int:
+    from benchmarks import environment
+    environment.prepare(args.backend, args.uri, args.database)
+
+    import httpx
+    from benchmarks import local_auth
+    from benchmarks.seed import PIXEL_PNG, seed
+    from config.database import db
+
+    started = time.perf_counter()
+    fixtures = seed(db, medicines=args.medicines, users=args.users, random_seed=args.seed)
+    fixtures["image"] = PIXEL_PNG
+    print(f"🌱 Seeded {args.medicines} medicines and {args.users} users in {time.perf_counter() - started:.1f}s")
+    tokens = {uid: local_auth.sign(uid) for uid in fixtures["user_ids"]}
+    scenarios = build_scenarios(fixtures, tokens)
+
+    import main as app_module
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+        # Runs the app's startup hooks (indexes, search index, leaderboards, clinic directory)
+        async with app_module.app.router.lifespan_context(app_module.app):
+            await drive(client, scenarios, args.warmup, args.concurrency, args.seed + 1)
+            latencies, errors, wall = await drive(client, scenarios, args.requests, args.concurrency, args.seed)
+
+    results = summarize(latencies, errors, wall)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print(f"\n⏱  {args.requests} requests, concurrency {args.concurrency}, {wall:.1f}s on {args.backend}\n")
+    print_table(results, baseline)
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save}.json")
+        with open(path, "w") as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+                    "git": git_revision(),
+                    "python": platform.python_version(),
+                    "backend": args.backend,
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "medicines": args.medicines,
+                    "users": args.users,
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\n💾 Baseline saved to {path}")
+
+    if baseline:
+        slower = regressions(results, baseline, args.tolerance)
+        if slower:
+            print(f"\n❌ p95 regressed by more than {args.tolerance:.0%}: {', '.join(slower)}")
+            return 1
+        print(f"\n✅ No p95 regression beyond {args.tolerance:.0%}")
+    return 1 if results["ALL"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["mongomock", "mongod"], default="mongomock")
+    parser.add_argument("--uri", default="mongodb://localhost:27017", help="mongod connection string (--backend mongod)")
+    parser.add_argument("--database", default="DrugScriptBench", help="Database to reseed; never point this at real data")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--medicines", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", metavar="NAME", help="Write results to benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="PATH", help="Baseline JSON to compare p95 against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 growth over the baseline (0.2 = 20%%)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,161 @@
+"""Synthetic, reproducible data set for benchmarks.
+
+Fills the benchmark database with medicines, clinics, profiles,
+prescriptions (some shared), received lists, reviews with their rating
+aggregates, and chat messages. The same seed always yields the same data.
+"""
+import base64
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from pymongo.database import Database
+
+SYLLABLES = ["am", "ox", "ci", "lin", "pa", "ra", "ce", "ta", "mol", "me", "pra", "zole", "na", "fex", "o", "dine", "cef", "ur", "ime", "lo"]
+DISTRICTS = ["Dhaka", "Chattogram", "Khulna", "Rajshahi", "Sylhet", "Barishal", "Rangpur", "Mymensingh"]
+# A 1x1 PNG: every seeded prescription shares this one content-addressed blob
+PIXEL_PNG = base64.b64encode(bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)).decode()
+
+COLLECTIONS = (
+    "medicines", "clinics", "profiles", "prescriptions", "recieved_prescription",
+    "reviews", "average_ratings", "messages",
+)
+
+
+def _word(rng: random.Random, parts: int) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(parts))
+
+
+def seed(
+    db: Database,
+    medicines: int = 5000,
+    clinics: int = 500,
+    users: int = 200,
+    prescriptions_per_user: int = 5,
+    reviews: int = 2000,
+    messages: int = 1000,
+    random_seed: int = 42,
+) -> Dict[str, List[Any]]:
+    """Replace the benchmark collections with generated data and return the ids workloads need"""
+    from config.blob_store import store_image
+    from models.profile import Gender
+    from routes.medicines.search_index import search_keys
+
+    rng = random.Random(random_seed)
+    for name in COLLECTIONS:
+        db[name].delete_many({})
+    now = datetime.utcnow()
+
+    generics = [_word(rng, rng.randint(3, 5)) for _ in range(max(1, medicines // 15))]
+    medicine_docs = []
+    for i in range(medicines):
+        doc = {
+            "slug": f"med-{i}",
+            "medicine_name": f"{_word(rng, rng.randint(2, 3)).title()} {rng.choice(['250 mg', '500 mg', 'Plus', 'DS', 'Syrup'])}",
+            "generic_name": rng.choice(generics).title(),
+            "manufacturer": f"{_word(rng, 2).title()} Pharma",
+            "price": round(rng.uniform(1, 500), 2),
+        }
+        doc.update(search_keys(doc))
+        medicine_docs.append(doc)
+    db.medicines.insert_many(medicine_docs)
+
+    db.clinics.insert_many([
+        {"Id": i, "Name": f"{_word(rng, 2).title()} Clinic", "Code": 1000 + i, "District": rng.choice(DISTRICTS)}
+        for i in range(clinics)
+    ])
+
+    user_ids = [f"bench-user-{i}" for i in range(users)]
+    db.profiles.insert_many([
+        {
+            "user_id": uid, "email": f"{uid}@bench.local", "name": _word(rng, 2).title(),
+            "age": rng.randint(18, 90), "address": None, "gender": rng.choice([Gender.MALE.value, Gender.FEMALE.value]),
+            "phone": f"01{rng.randint(100000000, 999999999)}", "date_of_birth": None, "blood_type": None,
+            "allergies": None, "medical_conditions": None, "emergency_contact": None,
+        }
+        for uid in user_ids
+    ])
+
+    image_key, image_size, image_content_type = store_image(PIXEL_PNG)
+    prescription_docs = []
+    for uid in user_ids:
+        for n in range(prescriptions_per_user):
+            prescription_docs.append({
+                "user_id": uid,
+                "doctor_name": f"Dr {_word(rng, 2).title()}",
+                "contact": f"01{rng.randint(100000000, 999999999)}",
+                "date": (now - timedelta(days=rng.randint(0, 365))).strftime("%d-%m-%Y"),
+                "diagnosis": _word(rng, 3),
+                "medicines": [{"slug": rng.choice(medicine_docs)["slug"]} for _ in range(rng.randint(1, 6))],
+                "image_key": image_key,
+                "image_size": image_size,
+                "image_content_type": image_content_type,
+                "created_by": uid,
+                "created_at": now - timedelta(minutes=rng.randint(0, 500000)),
+                "shared_with": [],
+            })
+    prescription_ids = db.prescriptions.insert_many(prescription_docs).inserted_ids
+
+    # Share about a third of the prescriptions with one to three other users
+    received: Dict[str, List[str]] = {}
+    for pid, doc in zip(prescription_ids, prescription_docs):
+        if rng.random() < 0.33:
+            recipients = rng.sample([u for u in user_ids if u != doc["user_id"]], k=min(rng.randint(1, 3), users - 1))
+            db.prescriptions.update_one({"_id": pid}, {"$set": {"shared_with": recipients}})
+            for uid in recipients:
+                received.setdefault(uid, []).append(str(pid))
+    if received:
+        db.recieved_prescription.insert_many([
+            {"user_id": uid, "prescription_id": pids, "created_at": now, "updated_at": now}
+            for uid, pids in received.items()
+        ])
+
+    doctor_ids = [f"doctor-{i}" for i in range(100)]
+    clinic_ids = [str(i) for i in range(min(clinics, 100))]
+    review_docs, aggregates = [], {}
+    for _ in range(reviews):
+        is_doctor = rng.random() < 0.5
+        subject_id = rng.choice(doctor_ids if is_doctor else clinic_ids)
+        rating = rng.randint(1, 5)
+        uid = rng.choice(user_ids)
+        review_docs.append({
+            "subject_id": subject_id, "is_doctor": is_doctor, "rating": rating, "review": _word(rng, 4),
+            "user_id": uid, "user_name": uid, "created_at": now - timedelta(minutes=rng.randint(0, 500000)),
+        })
+        aggregate = aggregates.setdefault((subject_id, is_doctor), {
+            "subject_id": subject_id, "is_doctor": is_doctor, "displayName": subject_id,
+            "sum": 0, "count": 0, "histogram": {str(r): 0 for r in range(1, 6)},
+        })
+        aggregate["sum"] += rating
+        aggregate["count"] += 1
+        aggregate["histogram"][str(rating)] += 1
+    if review_docs:
+        db.reviews.insert_many(review_docs)
+        for aggregate in aggregates.values():
+            aggregate["average_rating"] = round(aggregate["sum"] / aggregate["count"], 2)
+        db.average_ratings.insert_many(list(aggregates.values()))
+    # Seeded aggregates already match the reviews; nothing for startup to reconcile
+    db.migrations.update_one(
+        {"_id": "average_ratings.reconcile"},
+        {"$setOnInsert": {"applied_at": now, "updated": 0}},
+        upsert=True,
+    )
+
+    if messages:
+        db.messages.insert_many([
+            {"sender_id": rng.choice(user_ids), "content": _word(rng, 5), "timestamp": now - timedelta(seconds=messages - i)}
+            for i in range(messages)
+        ])
+
+    return {
+        "user_ids": user_ids,
+        "slugs": [doc["slug"] for doc in medicine_docs],
+        "medicine_names": [doc["medicine_name"] for doc in medicine_docs],
+        "generic_names": generics,
+        "prescriptions": [(str(pid), doc["user_id"]) for pid, doc in zip(prescription_ids, prescription_docs)],
+        "doctor_ids": doctor_ids,
+        "clinic_ids": clinic_ids,
+        "districts": DISTRICTS,
+    }
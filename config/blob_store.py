@@ -0,0 +1,209 @@
+import base64
+import binascii
+import hashlib
+import os
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Tuple
+import gridfs
+from config.database import db
+
+CHUNK_SIZE = 256 * 1024
+
+# Upper bound on the time between put() of an already stored image and the
+# insert of the document that references it (see BlobStore.delete)
+CLAIM_GRACE_SECONDS = float(os.getenv("BLOB_CLAIM_GRACE_SECONDS", "600"))
+
+# Magic numbers for the image formats the app uploads
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF8", "image/gif"),
+    (b"RIFF", "image/webp"),
+)
+
+
+def decode_image(data: str) -> bytes:
+    """Decode a base64 image string, accepting an optional data: URI prefix"""
+    if data.startswith("data:") and "," in data:
+        data = data.split(",", 1)[1]
+    try:
+        return base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Image is not valid base64: {e}")
+
+
+def detect_content_type(data: bytes) -> str:
+    for signature, content_type in _IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    return "application/octet-stream"
+
+
+def content_key(data: bytes) -> str:
+    """Content-addressed key: identical images are stored once"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore(ABC):
+    """Blob storage interface used for prescription images.
+
+    Blobs are content addressed and shared by every document holding the same
+    image. put() of content that already exists stores nothing but refreshes
+    the blob's claim time, which delete() checks atomically with the removal.
+    """
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        """Store (or claim the existing copy of) data and return its key"""
+
+    @abstractmethod
+    def size(self, key: str) -> Optional[int]:
+        """Size in bytes, or None if the blob does not exist"""
+
+    @abstractmethod
+    def read_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        """Yield the bytes in [start, end] (inclusive) in chunks"""
+
+    @abstractmethod
+    def delete(self, key: str, checked_at: datetime) -> bool:
+        """Delete the blob unless a put() claimed it since shortly before `checked_at`.
+
+        `checked_at` (UTC) is when the caller started the check that found no
+        document referencing the key. A concurrent put() of the same image may
+        already have claimed the blob while its document is not inserted yet,
+        so anything claimed within CLAIM_GRACE_SECONDS of that is kept.
+        Returns True if the blob was removed.
+        """
+
+
+def _claim_cutoff(checked_at: datetime) -> datetime:
+    return datetime.fromtimestamp(
+        checked_at.replace(tzinfo=timezone.utc).timestamp() - CLAIM_GRACE_SECONDS, timezone.utc
+    ).replace(tzinfo=None)
+
+
+class GridFSBlobStore(BlobStore):
+    def __init__(self, bucket_name: str = "prescription_images"):
+        self._bucket = gridfs.GridFSBucket(db, bucket_name=bucket_name, chunk_size_bytes=CHUNK_SIZE)
+        self._files = db[f"{bucket_name}.files"]
+        self._chunks = db[f"{bucket_name}.chunks"]
+
+    def _find(self, key: str):
+        return self._files.find_one({"filename": key}, {"_id": 1, "length": 1})
+
+    def put(self, data: bytes) -> str:
+        key = content_key(data)
+        now = datetime.utcnow()
+        # Claim an existing copy in the same round trip that checks for it
+        if not self._files.update_many({"filename": key}, {"$set": {"metadata.claimed_at": now}}).matched_count:
+            self._bucket.upload_from_stream(key, data, metadata={"claimed_at": now})
+        return key
+
+    def size(self, key: str) -> Optional[int]:
+        doc = self._find(key)
+        return doc["length"] if doc else None
+
+    def read_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        with self._bucket.open_download_stream_by_name(key) as stream:
+            stream.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = stream.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str, checked_at: datetime) -> bool:
+        cutoff = _claim_cutoff(checked_at)
+        unclaimed = {
+            "filename": key,
+            "$or": [
+                {"metadata.claimed_at": {"$lt": cutoff}},
+                # Uploaded before claims were recorded
+                {"metadata.claimed_at": {"$exists": False}, "uploadDate": {"$lt": cutoff}},
+            ],
+        }
+        deleted = False
+        # Removing the files document is the atomic step: a later put() no
+        # longer finds this copy and uploads a new one
+        while (doc := self._files.find_one_and_delete(unclaimed, projection={"_id": 1})) is not None:
+            self._chunks.delete_many({"files_id": doc["_id"]})
+            deleted = True
+        return deleted
+
+
+class FileSystemBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self._root = root
+
+    def _path(self, key: str) -> str:
+        # Fan out into sub-directories so no single directory gets huge
+        return os.path.join(self._root, key[:2], key)
+
+    def put(self, data: bytes) -> str:
+        key = content_key(data)
+        path = self._path(key)
+        try:
+            # The modification time is the claim time of an existing copy
+            os.utime(path)
+            return key
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return key
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._path(key))
+        except OSError:
+            return None
+
+    def read_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str, checked_at: datetime) -> bool:
+        path = self._path(key)
+        # Move the file aside first (atomic): from here on a put() finds no
+        # copy and writes a fresh one instead of claiming this one
+        doomed = f"{path}.{uuid.uuid4().hex}.deleting"
+        try:
+            os.rename(path, doomed)
+        except FileNotFoundError:
+            return False
+        if os.path.getmtime(doomed) >= _claim_cutoff(checked_at).replace(tzinfo=timezone.utc).timestamp():
+            # Claimed by a recent put(): restore it (same content, so replacing a fresh copy is harmless)
+            os.replace(doomed, path)
+            return False
+        os.remove(doomed)
+        return True
+
+
+def store_image(image: str) -> Tuple[str, int, str]:
+    """Decode a base64 image, store it and return (key, size, content_type)"""
+    data = decode_image(image)
+    return blob_store.put(data), len(data), detect_content_type(data)
+
+
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "gridfs")
+
+if BLOB_STORE_BACKEND == "filesystem":
+    blob_store: BlobStore = FileSystemBlobStore(os.getenv("BLOB_STORE_PATH", "blobs"))
+else:
+    blob_store = GridFSBlobStore()
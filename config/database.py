@@ -2,6 +2,7 @@ import os
 from pymongo import MongoClient
 from urllib.parse import quote_plus
 from dotenv import load_dotenv
+from utils.metrics import command_listener
 
 load_dotenv()
 
@@ -10,14 +11,34 @@ MONGODB_PASSWORD = os.getenv("MONGODB_PASSWORD")
 MONGODB_CLUSTER = os.getenv("MONGODB_CLUSTER")
 MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", "MedicineAppDB")
 MONGODB_APP_NAME = os.getenv("MONGODB_APP_NAME", "TryOut")
+# Full connection string override, e.g. mongodb://localhost:27017 for a local mongod
+MONGODB_URI = os.getenv("MONGODB_URI")
 
-if not all([MONGODB_USERNAME, MONGODB_PASSWORD, MONGODB_CLUSTER]):
+if not MONGODB_URI and not all([MONGODB_USERNAME, MONGODB_PASSWORD, MONGODB_CLUSTER]):
     raise ValueError("Missing required MongoDB environment variables. Please check your .env file.")
 
-password = quote_plus(MONGODB_PASSWORD)
+# Connection pool and timeouts (all optional)
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "10000"))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "30000"))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+
+if not MONGODB_URI:
+    password = quote_plus(MONGODB_PASSWORD)
+    MONGODB_URI = f"mongodb+srv://{MONGODB_USERNAME}:{password}@{MONGODB_CLUSTER}/?retryWrites=true&w=majority&appName={MONGODB_APP_NAME}"
 
 client = MongoClient(
-    f"mongodb+srv://{MONGODB_USERNAME}:{password}@{MONGODB_CLUSTER}/?retryWrites=true&w=majority&appName={MONGODB_APP_NAME}"
+    MONGODB_URI,
+    maxPoolSize=MONGODB_MAX_POOL_SIZE,
+    minPoolSize=MONGODB_MIN_POOL_SIZE,
+    serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    connectTimeoutMS=MONGODB_CONNECT_TIMEOUT_MS,
+    socketTimeoutMS=MONGODB_SOCKET_TIMEOUT_MS,
+    waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+    # Per-command timings for /metrics, slow-query logs and per-request stats
+    event_listeners=[command_listener],
 )
 
 # Unified database
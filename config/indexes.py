@@ -0,0 +1,180 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+from utils.pagination import encode_cursor, keyset_query
+
+# Every index the application relies on, per collection. Applied on startup by
+# ensure_indexes(); creating an index that already exists is a no-op. Unique
+# indexes are required: the app refuses to start without them.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "profiles": [
+        # Unique: auto-register upserts and create_profile rely on it to reject duplicates
+        IndexModel([("user_id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)]),
+    ],
+    "medicines": [
+        IndexModel([("slug", ASCENDING)]),
+        # Fields precomputed by scripts/import_medicines.py for the Mongo search path
+        IndexModel([("shorter_length", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("medicine_name_key", ASCENDING)]),
+        IndexModel([("generic_name_key", ASCENDING), ("shorter_length", ASCENDING)]),
+        # Newest edit, polled by CollectionWatcher when change streams are unavailable
+        IndexModel([("updated_at", DESCENDING)]),
+    ],
+    "clinics": [
+        IndexModel([("updated_at", DESCENDING)]),
+    ],
+    "prescriptions": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("shared_with", ASCENDING)]),
+        IndexModel([("image_key", ASCENDING)], sparse=True),
+    ],
+    "reviews": [
+        IndexModel([("subject_id", ASCENDING), ("is_doctor", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ],
+    "average_ratings": [
+        IndexModel([("is_doctor", ASCENDING), ("average_rating", DESCENDING)]),
+        IndexModel([("subject_id", ASCENDING), ("is_doctor", ASCENDING)]),
+    ],
+    "recieved_prescription": [
+        IndexModel([("user_id", ASCENDING)]),
+    ],
+    "messages": [
+        IndexModel([("timestamp", ASCENDING), ("_id", ASCENDING)]),
+    ],
+}
+
+# Any cursor will do: explain() only cares about the query shape
+_SAMPLE_CURSOR = encode_cursor(datetime(2024, 1, 1), ObjectId("0" * 24))
+
+
+def _page_query(
+    name: str, collection: str, base: Dict[str, Any], field: str, descending: bool, limit: int, cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """A paginated query exactly as the route builds it with keyset_query"""
+    filter, sort = keyset_query(base, field, cursor, descending)
+    return {"name": name, "collection": collection, "filter": filter, "sort": sort, "limit": limit + 1}
+
+
+# The hot query shapes each router issues, used by scripts/index_audit.py.
+# Values are placeholders: explain() only cares about the shape.
+CANONICAL_QUERIES: List[Dict[str, Any]] = [
+    {"name": "profile by user_id", "collection": "profiles", "filter": {"user_id": "uid"}},
+    {"name": "profile by email", "collection": "profiles", "filter": {"email": "a@b.c"}},
+    {"name": "medicine by slug", "collection": "medicines", "filter": {"slug": "napa"}},
+    {
+        "name": "medicine autocomplete",
+        "collection": "medicines",
+        "filter": {"medicine_name_key": {"$regex": "^na"}},
+        "sort": [("medicine_name_key", ASCENDING)],
+        "limit": 40,
+    },
+    {
+        "name": "generic autocomplete",
+        "collection": "medicines",
+        "filter": {"generic_name_key": {"$regex": "^pa"}},
+        "sort": [("generic_name_key", ASCENDING)],
+        "limit": 40,
+    },
+    {
+        "name": "medicine alternatives",
+        "collection": "medicines",
+        "filter": {"generic_name_key": "paracetamol", "slug": {"$ne": "napa"}},
+        "sort": [("shorter_length", ASCENDING)],
+    },
+    {
+        "name": "medicine newest edit",
+        "collection": "medicines",
+        "filter": {"updated_at": {"$exists": True}},
+        "sort": [("updated_at", DESCENDING)],
+        "limit": 1,
+    },
+    _page_query("prescriptions page", "prescriptions", {"user_id": "uid"}, "created_at", True, 50),
+    _page_query("prescriptions deep page", "prescriptions", {"user_id": "uid"}, "created_at", True, 50, _SAMPLE_CURSOR),
+    {
+        "name": "sent prescriptions",
+        "collection": "prescriptions",
+        "filter": {"user_id": "uid", "shared_with": {"$exists": True, "$ne": []}},
+    },
+    {"name": "prescriptions shared with me", "collection": "prescriptions", "filter": {"shared_with": "uid"}},
+    {"name": "prescriptions by image", "collection": "prescriptions", "filter": {"image_key": "abc"}},
+    _page_query("reviews page", "reviews", {"subject_id": "s", "is_doctor": True}, "created_at", True, 50),
+    _page_query(
+        "reviews deep page", "reviews", {"subject_id": "s", "is_doctor": True}, "created_at", True, 50, _SAMPLE_CURSOR
+    ),
+    {
+        "name": "top ratings",
+        "collection": "average_ratings",
+        "filter": {"is_doctor": True},
+        "sort": [("average_rating", DESCENDING)],
+        "limit": 50,
+    },
+    {"name": "rating aggregate", "collection": "average_ratings", "filter": {"subject_id": "s", "is_doctor": True}},
+    {"name": "received list", "collection": "recieved_prescription", "filter": {"user_id": "uid"}},
+    _page_query("newest messages", "messages", {}, "timestamp", True, 100),
+    _page_query("older messages", "messages", {}, "timestamp", True, 100, _SAMPLE_CURSOR),
+    _page_query("messages since", "messages", {"timestamp": {"$gt": datetime(2024, 1, 1)}}, "timestamp", False, 100),
+    _page_query(
+        "messages since, next page", "messages", {"timestamp": {"$gt": datetime(2024, 1, 1)}}, "timestamp", False, 100,
+        _SAMPLE_CURSOR,
+    ),
+]
+
+
+# (collection, index name) of unique indexes confirmed by the last ensure_indexes()
+_verified_unique: Set[Tuple[str, str]] = set()
+
+
+def missing_unique_indexes(database: Database) -> List[str]:
+    """Registered unique indexes that do not exist (or exist without `unique`) as "collection.name" """
+    missing = []
+    for collection_name, indexes in INDEXES.items():
+        unique = [model for model in indexes if model.document.get("unique")]
+        if not unique:
+            continue
+        existing = database[collection_name].index_information()
+        for model in unique:
+            name = model.document["name"]
+            if existing.get(name, {}).get("unique"):
+                _verified_unique.add((collection_name, name))
+            else:
+                _verified_unique.discard((collection_name, name))
+                missing.append(f"{collection_name}.{name}")
+    return missing
+
+
+def unique_index_verified(collection_name: str, name: str) -> bool:
+    """True once ensure_indexes() has seen the unique index in place"""
+    return (collection_name, name) in _verified_unique
+
+
+def ensure_indexes(database: Database) -> None:
+    """Create every registered index (idempotent).
+
+    A failure on one collection is reported and the remaining collections,
+    and the other indexes of that collection, are still indexed. A unique
+    index that is still missing afterwards (e.g. blocked by duplicates or by
+    an older non-unique index of the same name) raises RuntimeError.
+    """
+    for collection_name, indexes in INDEXES.items():
+        try:
+            database[collection_name].create_indexes(indexes)
+        except OperationFailure:
+            # Build them one by one so a single rejected index does not block the rest
+            for model in indexes:
+                try:
+                    database[collection_name].create_indexes([model])
+                except OperationFailure as e:
+                    print(f"❌ Failed to create index {model.document['name']} on {collection_name}: {e}")
+        except Exception as e:
+            print(f"❌ Failed to create indexes on {collection_name}: {e}")
+
+    missing = missing_unique_indexes(database)
+    if missing:
+        raise RuntimeError(
+            f"Required unique indexes missing: {', '.join(missing)} "
+            "(for profiles.user_id_1 run `python -m scripts.dedupe_profiles`)"
+        )
@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Callable, List, Tuple
+from pymongo import UpdateOne
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
+from routes.medicines.search_index import search_keys
+from routes.Reviews.ratings import reconcile_ratings
+
+BATCH_SIZE = 1000
+
+
+def backfill_created_at(collection_name: str) -> Callable[[Database], int]:
+    """Give legacy documents a created_at taken from their ObjectId.
+
+    Keyset pages are ordered by created_at, and a cursor condition on it
+    never matches a document that lacks the field.
+    """
+    def migrate(database: Database) -> int:
+        collection = database[collection_name]
+        updated = 0
+        # Only documents written before created_at existed, so a plain loop is fine
+        for doc in collection.find({"created_at": {"$exists": False}}, {"_id": 1}):
+            created_at = doc["_id"].generation_time.replace(tzinfo=None)  # naive UTC, like utcnow()
+            updated += collection.update_one(
+                {"_id": doc["_id"], "created_at": {"$exists": False}},
+                {"$set": {"created_at": created_at}},
+            ).modified_count
+        return updated
+    return migrate
+
+
+def backfill_search_keys(database: Database) -> int:
+    """Add the precomputed search fields to medicines stored before the importer wrote them.
+
+    The MongoDB search path matches and sorts on these fields only.
+    """
+    collection = database.medicines
+    now = datetime.utcnow()
+    updated = 0
+    ops = []
+    for doc in collection.find({"shorter_length": {"$exists": False}}, {"medicine_name": 1, "generic_name": 1}):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {**search_keys(doc), "updated_at": now}}))
+        if len(ops) >= BATCH_SIZE:
+            updated += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += collection.bulk_write(ops, ordered=False).modified_count
+    return updated
+
+
+# Data backfills the code relies on, applied in order on startup. Each one is
+# recorded in the `migrations` collection once it has run, so later startups
+# skip it; every migration must be safe to re-run (several workers may race).
+MIGRATIONS: List[Tuple[str, Callable[[Database], int]]] = [
+    ("prescriptions.created_at", backfill_created_at("prescriptions")),
+    ("reviews.created_at", backfill_created_at("reviews")),
+    ("medicines.search_keys", backfill_search_keys),
+    # Legacy aggregates carry only a client-supplied average, no sum/count
+    ("average_ratings.reconcile", reconcile_ratings),
+]
+
+
+def run_migrations(database: Database) -> None:
+    applied = {doc["_id"] for doc in database.migrations.find({}, {"_id": 1})}
+    for name, migrate in MIGRATIONS:
+        if name in applied:
+            continue
+        updated = migrate(database)
+        try:
+            database.migrations.insert_one({"_id": name, "applied_at": datetime.utcnow(), "updated": updated})
+        except DuplicateKeyError:
+            pass  # Another worker finished it at the same time
+        print(f"✅ Migration {name} applied ({updated} documents updated)")
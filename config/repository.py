@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from pymongo.collection import Collection
+from config.database import db, MONGODB_MAX_POOL_SIZE
+
+# Blocking pymongo calls run here instead of on the event loop. One thread per
+# pooled connection is enough: extra threads would only queue on the pool.
+_executor = ThreadPoolExecutor(max_workers=MONGODB_MAX_POOL_SIZE, thread_name_prefix="mongo")
+
+
+async def run_sync(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking database function on the Mongo worker pool and await its result"""
+    loop = asyncio.get_running_loop()
+    # Carry the request context into the worker so command metrics are attributed to it
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, partial(context.run, fn, *args, **kwargs))
+
+
+class AsyncCollection:
+    """Awaitable wrapper around a pymongo collection.
+
+    Mirrors the pymongo method names the routers use; cursors are
+    materialized inside the worker thread so callers only ever get lists.
+    """
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    @property
+    def name(self) -> str:
+        return self.collection.name
+
+    async def find(
+        self,
+        filter: Optional[Dict[str, Any]] = None,
+        projection: Optional[Dict[str, Any]] = None,
+        sort: Optional[Sequence[Tuple[str, int]]] = None,
+        limit: int = 0,
+        skip: int = 0,
+    ) -> List[Dict[str, Any]]:
+        def _find():
+            cursor = self.collection.find(filter or {}, projection, sort=sort, limit=limit, skip=skip)
+            return list(cursor)
+        return await run_sync(_find)
+
+    async def aggregate(self, pipeline: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+        return await run_sync(lambda: list(self.collection.aggregate(pipeline, **kwargs)))
+
+    async def find_one(self, *args, **kwargs):
+        return await run_sync(self.collection.find_one, *args, **kwargs)
+
+    async def count_documents(self, *args, **kwargs) -> int:
+        return await run_sync(self.collection.count_documents, *args, **kwargs)
+
+    async def insert_one(self, *args, **kwargs):
+        return await run_sync(self.collection.insert_one, *args, **kwargs)
+
+    async def insert_many(self, *args, **kwargs):
+        return await run_sync(self.collection.insert_many, *args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        return await run_sync(self.collection.update_one, *args, **kwargs)
+
+    async def update_many(self, *args, **kwargs):
+        return await run_sync(self.collection.update_many, *args, **kwargs)
+
+    async def delete_one(self, *args, **kwargs):
+        return await run_sync(self.collection.delete_one, *args, **kwargs)
+
+    async def find_one_and_update(self, *args, **kwargs):
+        return await run_sync(self.collection.find_one_and_update, *args, **kwargs)
+
+    async def find_one_and_delete(self, *args, **kwargs):
+        return await run_sync(self.collection.find_one_and_delete, *args, **kwargs)
+
+    async def bulk_write(self, *args, **kwargs):
+        return await run_sync(self.collection.bulk_write, *args, **kwargs)
+
+
+# Collections
+profiles = AsyncCollection(db["profiles"])
+medicines = AsyncCollection(db["medicines"])
+prescriptions = AsyncCollection(db["prescriptions"])
+messages = AsyncCollection(db["messages"])
+clinics = AsyncCollection(db["clinics"])
+reviews = AsyncCollection(db["reviews"])
+average_ratings = AsyncCollection(db["average_ratings"])
+recieved_prescriptions = AsyncCollection(db["recieved_prescription"])
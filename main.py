@@ -1,6 +1,10 @@
 import os
-from fastapi import FastAPI
+import asyncio
+import time
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from routes import profile_route
 from routes.medicines import medicine_route
 from routes.prescription import add_prescription
@@ -8,7 +12,17 @@ from routes.chat_channel import router as chat_channel
 from routes.qrCodes import scanqr
 from routes.sharing import recieved
 from routes.sharing import sent
-from routes.Reviews import clinic_review
+from routes.Reviews import clinic_review, ratings
+from routes.Reviews.clinic_directory import directory as clinic_directory
+from routes.medicines import drug_fetch
+from config.database import db, medicine_collection
+from config.indexes import ensure_indexes
+from config.migrations import run_migrations
+from utils.collection_watcher import CollectionWatcher
+from utils import metrics, profile_cache
+from auth import firebase_auth
+from schema.serializers import OrjsonResponse
+from pymongo.errors import PyMongoError
 # from config.database import test_database_connection
 from dotenv import load_dotenv
 
@@ -18,7 +32,8 @@ load_dotenv()
 app = FastAPI(
     title="DrugScript API",
     description="A medical prescription and medicine management system",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=OrjsonResponse
 )
 
 # Configure CORS
@@ -30,6 +45,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request database stats and route latency histograms for /metrics
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    stats = metrics.RequestStats(request.url.path)
+    token = metrics.current_request.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.current_request.reset(token)
+    elapsed = time.perf_counter() - started
+
+    # Label by route template, not raw path, to keep the series count bounded
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    stats.route = route
+    metrics.request_duration.observe((request.method, route, str(response.status_code)), elapsed)
+    metrics.request_db_duration.observe((request.method, route), stats.db_ms / 1000)
+    metrics.request_db_commands.observe((request.method, route), stats.commands)
+    response.headers["X-DB-Queries"] = str(stats.commands)
+    response.headers["Server-Timing"] = f"db;dur={stats.db_ms:.1f}, app;dur={elapsed * 1000:.1f}"
+    if stats.slowest is not None:
+        ms, command, collection = stats.slowest
+        response.headers["X-DB-Slowest"] = f"{command} {collection} {ms:.1f}ms"
+    return response
+
 # Test database connection on startup
 # @app.on_event("startup")
 # async def startup_event():
@@ -37,6 +77,68 @@ app.add_middleware(
 #     if not test_database_connection():
 #         raise Exception("Failed to connect to database")
 
+# Backfills must finish before requests rely on the fields they fill in
+@app.on_event("startup")
+async def apply_migrations():
+    await run_in_threadpool(run_migrations, db)
+
+# A missing unique index raises RuntimeError here and stops startup: the
+# profile upserts depend on it to keep one profile per user
+@app.on_event("startup")
+async def create_indexes():
+    try:
+        await run_in_threadpool(ensure_indexes, db)
+    except PyMongoError as e:
+        print(f"❌ Failed to ensure indexes: {e}")
+
+# Top doctor/clinic leaderboards are served from memory
+@app.on_event("startup")
+async def load_leaderboards():
+    try:
+        await run_in_threadpool(ratings.leaderboard.load)
+    except Exception as e:
+        print(f"❌ Failed to load rating leaderboards: {e}")
+    app.state.leaderboard_refresh = asyncio.create_task(
+        ratings.refresh_leaderboard_periodically(float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "60")))
+    )
+
+# Build the in-memory medicine search index and keep it in sync with the catalog
+medicine_watcher = CollectionWatcher(
+    medicine_collection,
+    drug_fetch.rebuild_search_index,
+    poll_interval=float(os.getenv("MEDICINE_INDEX_POLL_SECONDS", "300")),
+)
+
+# Pre-serialized clinic directory, reloaded when the clinics collection changes
+clinic_watcher = CollectionWatcher(
+    db["clinics"],
+    clinic_directory.load,
+    poll_interval=float(os.getenv("CLINIC_DIRECTORY_POLL_SECONDS", "300")),
+)
+
+@app.on_event("startup")
+async def build_medicine_index():
+    await run_in_threadpool(drug_fetch.rebuild_search_index)
+    medicine_watcher.start()
+
+@app.on_event("startup")
+async def load_clinic_directory():
+    try:
+        await run_in_threadpool(clinic_directory.load)
+    except Exception as e:
+        print(f"❌ Failed to load clinic directory: {e}")
+    clinic_watcher.start()
+
+@app.on_event("shutdown")
+async def stop_leaderboard_refresh():
+    app.state.leaderboard_refresh.cancel()
+
+@app.on_event("shutdown")
+async def stop_watchers():
+    medicine_watcher.stop()
+    clinic_watcher.stop()
+    drug_fetch.cancel_rebuild_retry()
+
 # Include routers
 app.include_router(profile_route.router)
 app.include_router(medicine_route.router)
@@ -47,6 +149,15 @@ app.include_router(scanqr.router)
 app.include_router(recieved.router)
 app.include_router(sent.router)
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition: route and MongoDB latency histograms plus cache counters"""
+    return PlainTextResponse(metrics.render({
+        "medicine_detail": medicine_route.detail_cache.stats(),
+        "profile": profile_cache.stats(),
+        "auth_token": firebase_auth._token_cache.stats(),
+    }), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {
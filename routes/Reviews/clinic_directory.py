@@ -0,0 +1,51 @@
+import gzip
+import hashlib
+import json
+import threading
+from typing import Optional
+from config.database import db
+
+
+class ClinicSnapshot:
+    """One immutable, pre-serialized version of the clinic directory"""
+
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9)
+        # Strong validators: identical bytes <=> identical ETag, so the gzip
+        # encoding of the body gets a tag of its own
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+
+class ClinicDirectory:
+    """Keeps the latest ClinicSnapshot; `load` swaps in a new one only if the data changed"""
+
+    def __init__(self):
+        self.snapshot: Optional[ClinicSnapshot] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> ClinicSnapshot:
+        clinics = [
+            {
+                "id": str(doc.get("Id")),
+                "name": doc.get("Name"),
+                "code": str(doc.get("Code")),
+                "district": doc.get("District")
+            }
+            for doc in db.clinics.find({}, {"_id": 0, "Id": 1, "Name": 1, "Code": 1, "District": 1}).sort("Id", 1)
+        ]
+        body = json.dumps(clinics, separators=(",", ":"), ensure_ascii=False).encode()
+
+        with self._lock:
+            current = self.snapshot
+            if current is None or current.body != body:
+                version = current.version + 1 if current else 1
+                self.snapshot = ClinicSnapshot(version, body)
+                print(f"Clinic directory v{version} loaded with {len(clinics)} clinics.")
+            return self.snapshot
+
+
+directory = ClinicDirectory()
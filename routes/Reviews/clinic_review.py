@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from pydantic import BaseModel, Field
 from auth.firebase_auth import get_current_user, get_current_user_with_username
-from config.database import db
+from config import repository as repo
+from utils.pagination import keyset_query, paginate
+from routes.Reviews.ratings import leaderboard, record_rating
+from routes.Reviews.clinic_directory import directory
+from schema.serializers import Projection, list_response
 from datetime import datetime
 from bson.objectid import ObjectId
 from typing import List, Optional
@@ -23,7 +27,7 @@ class ReviewCreate(BaseModel):
     is_doctor:   bool
     rating:      int    = Field(..., ge=1, le=5)
     review:      str
-    average_rating: float               # still here if your Flutter client sends it
+    average_rating: Optional[float] = None  # ignored: the server maintains averages itself
 
 class ReviewModel(BaseModel):
     id:           str
@@ -38,6 +42,15 @@ class ReviewModel(BaseModel):
     class Config:
         orm_mode = True
 
+# Raw document -> response shape, built once per model
+clinic_out = Projection(
+    ClinicModel,
+    sources={"id": "Id", "name": "Name", "code": "Code", "district": "District"},
+    converters={"id": str, "code": str},
+    defaults={"id": "", "name": "", "code": "", "district": ""},
+)
+review_out = Projection(ReviewModel, sources={"id": "_id"}, converters={"id": str})
+
 class TopDoctorModel(BaseModel):
     subject_id: str
     average_rating: float = Field(..., ge=0.0)
@@ -51,21 +64,29 @@ class TopClinicModel(BaseModel):
 
 
 @router.get("/clinics", response_model=List[ClinicModel])
-async def get_all_clinics(current_user: dict = Depends(get_current_user)):
+async def get_all_clinics(
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
+    """Whole clinic directory from the in-memory snapshot, with ETag/304 and gzip"""
     try:
-        clinics = []
-        cursor = db.clinics.find({})
-        for doc in cursor:
-            clinics.append({
-                "id": str(doc.get("Id")),
-                "name": doc.get("Name"),
-                "code": str(doc.get("Code")),
-                "district": doc.get("District")
-            })
-        return clinics
+        snapshot = directory.snapshot or await repo.run_sync(directory.load)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+    gzipped = bool(accept_encoding and "gzip" in accept_encoding.lower())
+    etag = snapshot.gzip_etag if gzipped else snapshot.etag
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    # Either encoding of the current snapshot is still fresh for the client
+    if if_none_match and {snapshot.etag, snapshot.gzip_etag} & {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return Response(snapshot.gzipped, media_type="application/json", headers=headers)
+    return Response(snapshot.body, media_type="application/json", headers=headers)
+
 
 
 @router.get("/clinics/_search", response_model=List[ClinicModel])
@@ -76,16 +97,8 @@ async def search_clinics(
 ):
     try:
         regex   = {"$regex": q, "$options": "i"}
-        cursor  = db.clinics.find({"Name": regex}).limit(limit)
-        results = []
-        for doc in cursor:
-            results.append({
-                "id":       str(doc.get("Id", "")),          # safe
-                "name":     doc.get("Name", ""),
-                "code":     str(doc.get("Code", "")),        # safe
-                "district": doc.get("District", "")
-            })
-        return results
+        docs    = await repo.clinics.find({"Name": regex}, clinic_out.mongo, limit=limit)
+        return list_response(clinic_out.many(docs))
     except Exception as e:
         print("🔴 /clinics/search failed:", repr(e))
         raise HTTPException(
@@ -111,15 +124,11 @@ async def create_review(
             "created_at": datetime.utcnow()
         }
 
-        res = db.reviews.insert_one(doc)
+        res = await repo.reviews.insert_one(doc)
         doc["id"] = str(res.inserted_id)
 
-        db.average_ratings.update_one(
-            {"subject_id": payload.subject_id, "is_doctor": payload.is_doctor, "displayName" : payload.displayName},
-            {"$set": {"average_rating": payload.average_rating}},
-
-            upsert=True
-        )
+        # Server-side running aggregate (sum/count/histogram), never the client's number
+        await record_rating(payload.subject_id, payload.is_doctor, payload.displayName, payload.rating)
 
         return doc
     except Exception as e:
@@ -130,28 +139,25 @@ async def create_review(
 # ——— Get reviews for a clinic or doctor ———
 @router.get("/reviews", response_model=List[ReviewModel])
 async def get_reviews(
+    response: Response,
     subject_id: str = Query(...),
     is_doctor: bool = Query(...),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     current_user: dict = Depends(get_current_user),
 ):
+    """Newest reviews first; the cursor for the next page is sent in the X-Next-Cursor header"""
     try:
-        cursor = db.reviews.find({
-            "subject_id": subject_id,
-            "is_doctor": is_doctor
-        }).sort("created_at", -1)
-        out = []
-        for r in cursor:
-            out.append({
-                "id": str(r["_id"]),
-                "subject_id": r["subject_id"],
-                "is_doctor": r["is_doctor"],
-                "rating": r["rating"],
-                "review": r["review"],
-                "user_id": r["user_id"],
-                "user_name": r["user_name"],
-                "created_at": r["created_at"]
-            })
-        return out
+        query, sort = keyset_query(
+            {"subject_id": subject_id, "is_doctor": is_doctor}, "created_at", cursor, descending=True
+        )
+        docs = await repo.reviews.find(query, review_out.mongo, sort=sort, limit=limit + 1)
+        docs, next_cursor = paginate(docs, limit, "created_at")
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return list_response(review_out.many(docs), response)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
     
@@ -164,60 +170,22 @@ async def get_top_doctors(
 ):
     """
     Returns the top `limit` doctors sorted descending by their
-    stored `average_rating` in the average_ratings collection.
+    server-maintained `average_rating`, served from the in-memory leaderboard.
     """
-    try:
-        # filter for doctors only, sort by average_rating desc, limit to `limit`
-        cursor = (
-            db.average_ratings
-            .find({"is_doctor": True})
-            .sort("average_rating", -1)
-            .limit(limit)
-        )
-        results = [
-            {
-                "subject_id": doc["subject_id"],
-                "average_rating": doc["average_rating"],
-            }
-            for doc in cursor
-        ]
-        return results
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Unable to fetch top doctors: {e}"
-        )
+    return list_response([
+        {"subject_id": entry["subject_id"], "average_rating": entry["average_rating"]}
+        for entry in leaderboard.top(True, limit)
+    ])
     
 
 
 @router.get("/clinics/top", response_model=List[TopClinicModel], summary="Get top N clinic by average rating")
-async def get_top_doctors(
+async def get_top_clinics(
     limit: int = Query(5, ge=1, le=50, description="How many top clinic to return"),
     current_user: dict = Depends(get_current_user),
 ):
     """
     Returns the top `limit` clinics sorted descending by their
-    stored `average_rating` in the average_ratings collection.
+    server-maintained `average_rating`, served from the in-memory leaderboard.
     """
-    try:
-        # filter for doctors only, sort by average_rating desc, limit to `limit`
-        cursor = (
-            db.average_ratings
-            .find({"is_doctor": False})
-            .sort("average_rating", -1)
-            .limit(limit)
-        )
-        results = [
-            {
-                "subject_id": doc["subject_id"],
-                "displayName": doc["displayName"],
-                "average_rating": doc["average_rating"],
-            }
-            for doc in cursor
-        ]
-        return results
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Unable to fetch top doctors: {e}"
-        )   
\ No newline at end of file
+    return list_response(leaderboard.top(False, limit))
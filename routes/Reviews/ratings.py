@@ -0,0 +1,168 @@
+import asyncio
+import os
+import threading
+from typing import Dict, List
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.database import Database
+from config.database import db
+from config import repository as repo
+
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "50"))
+RATING_VALUES = (1, 2, 3, 4, 5)
+
+
+class Leaderboard:
+    """In-memory top-N of `average_ratings` for doctors and for clinics.
+
+    Loaded from MongoDB at startup and refreshed periodically (to pick up
+    writes made by other workers); this worker's own writes are applied
+    immediately through `update`.
+    """
+
+    def __init__(self, size: int = LEADERBOARD_SIZE):
+        self.size = size
+        self._boards: Dict[bool, List[dict]] = {True: [], False: []}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        boards = {}
+        for is_doctor in (True, False):
+            cursor = (
+                db.average_ratings
+                .find({"is_doctor": is_doctor}, {"_id": 0, "subject_id": 1, "displayName": 1, "average_rating": 1})
+                .sort("average_rating", -1)
+                .limit(self.size)
+            )
+            boards[is_doctor] = [self._entry(doc) for doc in cursor]
+        with self._lock:
+            self._boards = boards
+
+    @staticmethod
+    def _entry(doc: dict) -> dict:
+        return {
+            "subject_id": doc["subject_id"],
+            "displayName": doc.get("displayName", ""),
+            "average_rating": doc.get("average_rating", 0.0),
+        }
+
+    def update(self, doc: dict) -> bool:
+        """Apply a freshly written aggregate.
+
+        Returns True when the board must be reloaded: a member that dropped to
+        the last slot may now be outranked by a subject outside the board.
+        """
+        entry = self._entry(doc)
+        with self._lock:
+            board = [e for e in self._boards[doc["is_doctor"]] if e["subject_id"] != entry["subject_id"]]
+            was_member = len(board) < len(self._boards[doc["is_doctor"]])
+            board.append(entry)
+            board.sort(key=lambda e: e["average_rating"], reverse=True)
+            dropped_to_last = was_member and board[-1] is entry and len(board) >= self.size
+            self._boards[doc["is_doctor"]] = board[:self.size]
+        return dropped_to_last
+
+    def top(self, is_doctor: bool, limit: int) -> List[dict]:
+        return self._boards[is_doctor][:limit]
+
+
+leaderboard = Leaderboard()
+
+
+async def record_rating(subject_id: str, is_doctor: bool, display_name: str, rating: int) -> dict:
+    """Atomically add one rating to the subject's aggregate and return the new aggregate"""
+    # A pipeline update computes the average from the new sum and count in the
+    # same write, so it can never disagree with them under concurrent reviews
+    doc = await repo.average_ratings.find_one_and_update(
+        {"subject_id": subject_id, "is_doctor": is_doctor},
+        [
+            {"$set": {
+                "sum": {"$add": [{"$ifNull": ["$sum", 0]}, rating]},
+                "count": {"$add": [{"$ifNull": ["$count", 0]}, 1]},
+                f"histogram.{rating}": {"$add": [{"$ifNull": [f"$histogram.{rating}", 0]}, 1]},
+                "displayName": {"$literal": display_name},
+            }},
+            {"$set": {"average_rating": {"$divide": ["$sum", "$count"]}}},
+        ],
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    if leaderboard.update(doc):
+        await repo.run_sync(leaderboard.load)
+    return doc
+
+
+def remove_duplicate_aggregates(database: Database = db) -> int:
+    """Keep one aggregate per (subject_id, is_doctor); returns documents deleted.
+
+    Older aggregates were keyed by displayName too, so a subject can have
+    several; the survivor is overwritten by reconcile_ratings.
+    """
+    duplicates = database.average_ratings.aggregate([
+        {"$sort": {"_id": 1}},
+        {"$group": {
+            "_id": {"subject_id": "$subject_id", "is_doctor": "$is_doctor"},
+            "ids": {"$push": "$_id"},
+        }},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ], allowDiskUse=True)
+    extra = [_id for group in duplicates for _id in group["ids"][1:]]
+    deleted = 0
+    for start in range(0, len(extra), 1000):
+        deleted += database.average_ratings.delete_many({"_id": {"$in": extra[start:start + 1000]}}).deleted_count
+    return deleted
+
+
+def reconcile_ratings(database: Database = db) -> int:
+    """Recompute every aggregate from the reviews collection; returns subjects written.
+
+    Idempotent; registered as a startup migration because record_rating
+    needs sum and count, which legacy aggregates do not have.
+    """
+    removed = remove_duplicate_aggregates(database)
+    if removed:
+        print(f"🧹 Removed {removed} duplicate rating aggregates")
+    pipeline = [
+        {
+            "$group": {
+                "_id": {"subject_id": "$subject_id", "is_doctor": "$is_doctor"},
+                "sum": {"$sum": "$rating"},
+                "count": {"$sum": 1},
+                **{
+                    f"r{value}": {"$sum": {"$cond": [{"$eq": ["$rating", value]}, 1, 0]}}
+                    for value in RATING_VALUES
+                },
+            }
+        }
+    ]
+    written = 0
+    ops = []
+    for group in database.reviews.aggregate(pipeline, allowDiskUse=True):
+        ops.append(UpdateOne(
+            {"subject_id": group["_id"]["subject_id"], "is_doctor": group["_id"]["is_doctor"]},
+            {"$set": {
+                "sum": group["sum"],
+                "count": group["count"],
+                "histogram": {str(value): group[f"r{value}"] for value in RATING_VALUES},
+                "average_rating": group["sum"] / group["count"],
+            }},
+            upsert=True,
+        ))
+        if len(ops) >= 1000:
+            database.average_ratings.bulk_write(ops, ordered=False)
+            written += len(ops)
+            ops = []
+    if ops:
+        database.average_ratings.bulk_write(ops, ordered=False)
+        written += len(ops)
+    leaderboard.load()
+    return written
+
+
+async def refresh_leaderboard_periodically(interval: float) -> None:
+    """Reload the leaderboard every `interval` seconds so other workers' writes show up"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await repo.run_sync(leaderboard.load)
+        except Exception as e:
+            print(f"Error refreshing rating leaderboards: {e}")
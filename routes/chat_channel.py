@@ -1,36 +1,150 @@
-from fastapi import APIRouter, status
-from typing import List
-from config.database import messages_collection
+import asyncio
+from fastapi import APIRouter, Query, Response, WebSocket, WebSocketDisconnect, status
+from typing import List, Optional, Set
+from config import repository as repo
+from utils.pagination import keyset_query, paginate
 from datetime import datetime
 from models.chat import MessageCreate, MessageOut
+from schema.serializers import Projection, list_response
 
 router = APIRouter(prefix="/messages", tags=["Messages"])
 
-@router.post("/", response_model=MessageOut, status_code=status.HTTP_201_CREATED)
-async def send_message(message: MessageCreate):
+
+class ChatHub:
+    """In-process fan-out of new messages to connected WebSocket clients.
+
+    Each subscriber gets a bounded queue; a client too slow to keep up is
+    dropped rather than allowed to grow memory (it can reconnect with `since`).
+    Only clients connected to this worker process are reached.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self._queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, message: dict) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._subscribers.discard(queue)
+
+    def is_subscribed(self, queue: asyncio.Queue) -> bool:
+        return queue in self._subscribers
+
+
+hub = ChatHub()
+
+
+message_out = Projection(MessageOut, sources={"id": "_id"}, converters={"id": str})
+
+
+async def save_message(message: MessageCreate) -> dict:
     msg_doc = {
         "sender_id": message.sender_id,
         "content": message.content,
         "timestamp": datetime.utcnow()
     }
-    result = messages_collection.insert_one(msg_doc)
-    msg_doc["id"] = str(result.inserted_id)
-    return {
-        "id": msg_doc["id"],
-        "sender_id": msg_doc["sender_id"],
-        "content": msg_doc["content"],
-        "timestamp": msg_doc["timestamp"]
-    }
+    # insert_one sets msg_doc["_id"]
+    await repo.messages.insert_one(msg_doc)
+    out = message_out(msg_doc)
+    hub.publish(MessageOut(**out).model_dump(mode="json"))
+    return out
+
+@router.post("/", response_model=MessageOut, status_code=status.HTTP_201_CREATED)
+async def send_message(message: MessageCreate):
+    return await save_message(message)
 
 @router.get("/", response_model=List[MessageOut])
-async def get_messages():
-    messages = messages_collection.find().sort("timestamp", 1)
-    return [
-        {
-            "id": str(msg["_id"]),
-            "sender_id": msg["sender_id"],
-            "content": msg["content"],
-            "timestamp": msg["timestamp"]
-        }
-        for msg in messages
-    ]
\ No newline at end of file
+async def get_messages(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    since: Optional[datetime] = Query(None, description="Only messages newer than this timestamp"),
+):
+    """Chat history, oldest first within each page.
+
+    Without `since` this is the newest `limit` messages and X-Next-Cursor
+    pages back to older ones. With `since` the page starts right after that
+    timestamp and X-Next-Cursor pages forward (send `since` with it again).
+    """
+    forward = since is not None
+    base = {"timestamp": {"$gt": since}} if forward else {}
+    query, sort = keyset_query(base, "timestamp", cursor, descending=not forward)
+    messages = await repo.messages.find(query, message_out.mongo, sort=sort, limit=limit + 1)
+    messages, next_cursor = paginate(messages, limit, "timestamp")
+    if not forward:
+        messages.reverse()
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return list_response(message_out.many(messages), response)
+
+
+@router.websocket("/ws")
+async def message_stream(
+    websocket: WebSocket,
+    since: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=500),
+):
+    """Push new messages as they are sent.
+
+    With `since`, up to `limit` messages written after that timestamp are
+    replayed first so a reconnecting client only receives the delta. If more
+    were missed, a `{"next_cursor": ...}` frame follows the replay and the
+    client pages the rest from GET /messages/ with the same `since` and that
+    cursor. Clients may also send `{"sender_id": ..., "content": ...}` frames
+    to post a message.
+    """
+    await websocket.accept()
+    # Subscribe before reading the backlog so nothing written in between is lost
+    queue = hub.subscribe()
+    try:
+        replayed = set()
+        if since:
+            query, sort = keyset_query({"timestamp": {"$gt": since}}, "timestamp", None, descending=False)
+            backlog = await repo.messages.find(query, message_out.mongo, sort=sort, limit=limit + 1)
+            backlog, next_cursor = paginate(backlog, limit, "timestamp")
+            for msg in backlog:
+                out = MessageOut(**message_out(msg)).model_dump(mode="json")
+                replayed.add(out["id"])
+                await websocket.send_json(out)
+            if next_cursor:
+                await websocket.send_json({"next_cursor": next_cursor})
+
+        async def push():
+            while True:
+                out = await queue.get()
+                if out["id"] not in replayed:
+                    await websocket.send_json(out)
+                if queue.empty() and not hub.is_subscribed(queue):
+                    # Dropped for falling behind; the client should reconnect with `since`
+                    await websocket.close(code=1013)
+                    return
+
+        async def receive():
+            while True:
+                try:
+                    await save_message(MessageCreate(**await websocket.receive_json()))
+                except (ValueError, TypeError) as e:
+                    await websocket.send_json({"error": str(e)})
+
+        tasks = [asyncio.create_task(push()), asyncio.create_task(receive())]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, WebSocketDisconnect):
+                raise error
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unsubscribe(queue)
\ No newline at end of file
@@ -1,11 +1,32 @@
 from urllib.parse import quote_plus
 from pymongo import MongoClient
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import math
+import os
+import re
+import threading
 from config.database import db, client  # Import from unified config
+from routes.medicines.search_index import GenericGroups, MedicineSearchIndex, normalize_name
+
+# Precomputed search fields (see search_index.search_keys) and the watcher's
+# updated_at stamp are internal
+PUBLIC_PROJECTION = {"_id": 0, "medicine_name_key": 0, "generic_name_key": 0, "shorter_length": 0, "updated_at": 0}
+
+# Fields returned for each hit in search result lists; full documents come from /medicine/{slug}
+SUMMARY_FIELDS = [f.strip() for f in os.getenv("MEDICINE_SUMMARY_FIELDS", "slug,medicine_name,generic_name").split(",") if f.strip()]
+SUMMARY_PROJECTION = {"_id": 0, **{field: 1 for field in SUMMARY_FIELDS}}
+
+# Process-local search index, swapped atomically on every rebuild
+_search_index: Optional[MedicineSearchIndex] = None
+# Same-generic groups, rebuilt from the same catalog load as the index
+_generic_groups: Optional[GenericGroups] = None
+_rebuild_lock = threading.Lock()
+# A failed catalog load is retried after this delay rather than waiting for the next change
+REBUILD_RETRY_SECONDS = float(os.getenv("MEDICINE_INDEX_RETRY_SECONDS", "30"))
+_retry_timer: Optional[threading.Timer] = None
 
 def clean_document(doc):
-    """Replace NaN values with None to make JSON serializable"""
+    """Replace NaN values with None; applied when medicines are written, not per request"""
     if doc is None:
         return None
         
@@ -21,85 +42,162 @@ def clean_document(doc):
     
     return doc
 
-def load_medicines() -> List[Dict[str, Any]]:
-    """Load medicines from MongoDB and return as a list of dictionaries"""
+def nan_paths(doc, prefix: str = "") -> List[str]:
+    """Dotted paths of every NaN value in a stored document (for backfilling existing data)"""
+    paths = []
+    items = doc.items() if isinstance(doc, dict) else enumerate(doc) if isinstance(doc, list) else ()
+    for key, value in items:
+        path = f"{prefix}{key}"
+        if isinstance(value, float) and math.isnan(value):
+            paths.append(path)
+        elif isinstance(value, (dict, list)):
+            paths.extend(nan_paths(value, f"{path}."))
+    return paths
+
+def load_medicines() -> Optional[List[Dict[str, Any]]]:
+    """Load medicines from MongoDB as a list of dictionaries, or None if the query failed"""
     try:
         # Use unified database connection
         medicines_collection = db["medicines"]
-        medicines = list(medicines_collection.find({}, {'_id': 0}))  # Exclude MongoDB _id from results
-        
-        # Clean NaN values in the data
-        medicines = clean_document(medicines)
+        medicines = list(medicines_collection.find({}, PUBLIC_PROJECTION))  # Exclude MongoDB _id from results
         
         print(f"Successfully loaded {len(medicines)} medicine entries from MedicineAppDB.")
         return medicines
     except Exception as e:
         print(f"Error retrieving data from MedicineAppDB: {e}")
-        return []
+        return None
+
+def get_search_index() -> Optional[MedicineSearchIndex]:
+    """Return the current in-memory search index, or None if it has not been built yet"""
+    return _search_index
+
+def get_generic_groups() -> Optional[GenericGroups]:
+    """Return the current generic-name groups, or None if the catalog has not loaded yet"""
+    return _generic_groups
 
-def search_medicine(query: str) -> List[Dict[str, Any]]:
-    """Search medicines by name, generic name using MongoDB, sorted by shortest name length"""
+def catalog_version() -> int:
+    """Bumped every time the medicines collection is reloaded; 0 before the first load"""
+    return _search_index.version if _search_index else 0
+
+def rebuild_search_index() -> Optional[MedicineSearchIndex]:
+    """Reload the catalog and replace the in-memory search index.
+
+    After a failed load the previous index (or none, so routes fall back to
+    MongoDB) stays in place and the rebuild is retried in the background.
+    """
+    global _search_index, _generic_groups
+    with _rebuild_lock:
+        medicines = load_medicines()
+        if medicines is None:
+            _schedule_retry()
+            return _search_index
+        version = _search_index.version + 1 if _search_index else 1
+        index = MedicineSearchIndex(medicines, version=version)
+        _generic_groups = GenericGroups(index.ranked())
+        _search_index = index
+        cancel_rebuild_retry()
+        print(f"Medicine search index v{version} built with {len(_search_index)} entries.")
+        return _search_index
+
+def _schedule_retry() -> None:
+    global _retry_timer
+    if _retry_timer is not None and _retry_timer.is_alive() and _retry_timer is not threading.current_thread():
+        return
+    print(f"Retrying the medicine search index build in {REBUILD_RETRY_SECONDS:g}s")
+    _retry_timer = threading.Timer(REBUILD_RETRY_SECONDS, rebuild_search_index)
+    _retry_timer.daemon = True
+    _retry_timer.start()
+
+def cancel_rebuild_retry() -> None:
+    """Stop a pending retry (after a successful rebuild, and on shutdown)"""
+    if _retry_timer is not None:
+        _retry_timer.cancel()
+
+def summarize(medicine: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a catalog document to the SUMMARY_FIELDS it has"""
+    return {field: medicine[field] for field in SUMMARY_FIELDS if field in medicine}
+
+def search_medicine(
+    query: str,
+    limit: int = 40,
+    offset: int = 0,
+    projection: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Search medicines by name, generic name using MongoDB, sorted by shortest name length.
+
+    Used until the in-memory index is built. Names must start with the query
+    (the index also matches inside names): an anchored pattern is an index
+    range scan on the *_key fields. Only the requested page is ranked and
+    returned: $sort directly followed by $skip/$limit becomes a bounded
+    top-k sort on the server.
+    """
     try:
         # Use unified database connection
         medicines_collection = db["medicines"]
-        
+
+        # Match against the normalized keys and rank by the shorter_length field,
+        # all precomputed (importer, or the startup backfill in config/migrations.py)
+        pattern = "^" + re.escape(normalize_name(query))
         results = list(medicines_collection.aggregate([
-            # Match documents containing the query
             {
                 "$match": {
                     "$or": [
-                        {"medicine_name": {"$regex": query, "$options": "i"}},
-                        {"generic_name": {"$regex": query, "$options": "i"}}
+                        {"medicine_name_key": {"$regex": pattern}},
+                        {"generic_name_key": {"$regex": pattern}}
                     ]
                 }
             },
-            # Simply convert all fields to strings directly
+            # Sort by the shorter length (ascending = shortest first); _id keeps pages stable
             {
-                "$addFields": {
-                    "medicine_name_str": {"$toString": {"$ifNull": ["$medicine_name", ""]}},
-                    "generic_name_str": {"$toString": {"$ifNull": ["$generic_name", ""]}}
-                }
+                "$sort": {"shorter_length": 1, "_id": 1}
             },
-            # Calculate lengths of the string versions
             {
-                "$addFields": {
-                    "medicine_name_length": {"$strLenCP": "$medicine_name_str"},
-                    "generic_name_length": {"$strLenCP": "$generic_name_str"}
-                }
-            },
-            # Add a field with the shorter of the two lengths
-            {
-                "$addFields": {
-                    "shorter_length": {
-                        "$cond": {
-                            "if": {"$lte": ["$medicine_name_length", "$generic_name_length"]},
-                            "then": "$medicine_name_length",
-                            "else": "$generic_name_length"
-                        }
-                    }
-                }
+                "$skip": offset
             },
-            # Sort by the shorter length (ascending = shortest first)
             {
-                "$sort": {"shorter_length": 1}
+                "$limit": limit
             },
-            # Remove the temporary fields from results
             {
-                "$project": {
-                    "medicine_name_str": 0,
-                    "generic_name_str": 0,
-                    "medicine_name_length": 0,
-                    "generic_name_length": 0,
-                    "shorter_length": 0,
-                    "_id": 0
-                }
+                "$project": projection or SUMMARY_PROJECTION
             }
         ]))
         
-        # Clean NaN values in the results before returning
-        results = clean_document(results)
-        
+        # Any NaN left in legacy data is emitted as null by the orjson response
         return results
     except Exception as e:
         print(f"Error searching medicines in MedicineAppDB: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def autocomplete_medicine(prefix: str, limit: int = 10) -> List[Dict[str, str]]:
+    """Name prefix suggestions from MongoDB; used until the in-memory index is built"""
+    needle = normalize_name(prefix)
+    if not needle:
+        return []
+    try:
+        medicines_collection = db["medicines"]
+        pattern = "^" + re.escape(needle)  # Anchored, so the key indexes are used
+        suggestions: Dict[str, Dict[str, str]] = {}
+        for field in ("medicine_name", "generic_name"):
+            key_field = f"{field}_key"
+            cursor = medicines_collection.find(
+                {key_field: {"$regex": pattern}}, {"_id": 0, "slug": 1, field: 1, key_field: 1}
+            ).sort(key_field, 1).limit(limit * 4)
+            for doc in cursor:
+                if doc.get("slug") and doc[key_field] not in suggestions:
+                    suggestions[doc[key_field]] = {"name": str(doc.get(field)), "slug": doc["slug"]}
+        return [suggestions[key] for key in sorted(suggestions)[:limit]]
+    except Exception as e:
+        print(f"Error autocompleting medicines in MedicineAppDB: {e}")
+        return []
+
+def find_alternatives(slug: str) -> Optional[List[Dict[str, Any]]]:
+    """Same-generic medicines from MongoDB; used until the catalog is loaded. None if slug is unknown"""
+    medicines_collection = db["medicines"]
+    medicine = medicines_collection.find_one({"slug": slug}, {"_id": 0, "generic_name_key": 1})
+    if medicine is None:
+        return None
+    if not medicine.get("generic_name_key"):
+        return []
+    return list(medicines_collection.find(
+        {"generic_name_key": medicine["generic_name_key"], "slug": {"$ne": slug}}, SUMMARY_PROJECTION
+    ).sort("shorter_length", 1))
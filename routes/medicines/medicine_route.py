@@ -1,27 +1,144 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+import os
+from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
 import routes.medicines.drug_fetch as drug_fetch
-from config.database import db
+from config import repository as repo
+from schema.serializers import OrjsonResponse, json_bytes
+from utils.cache import TTLCache
 
 
 router = APIRouter()
 
 
+SEARCH_RESULT_LIMIT = 40
+MAX_SEARCH_RESULT_LIMIT = 100
+# Time allowed for fuzzy scoring per request; keeps typeahead responsive
+FUZZY_SEARCH_BUDGET_MS = float(os.getenv("FUZZY_SEARCH_BUDGET_MS", "25"))
+
+
 class SearchQuery(BaseModel):
     query: str
+    limit: int = Field(SEARCH_RESULT_LIMIT, ge=1, le=MAX_SEARCH_RESULT_LIMIT)
+    offset: int = Field(0, ge=0)
+    # Typo-tolerant: exact matches first, then near-misses by edit distance
+    fuzzy: bool = False
+
+
+MAX_BATCH_SLUGS = 100
+
+
+class BatchQuery(BaseModel):
+    slugs: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_SLUGS)
 
 
-@router.post("/medicinesearch")
+# Serialized detail responses keyed by (catalog version, slug): a catalog
+# reload bumps the version, so stale entries are never served and age out.
+detail_cache = TTLCache(
+    maxsize=int(os.getenv("MEDICINE_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("MEDICINE_CACHE_TTL", "600")),
+)
+NOT_FOUND_BODY = json_bytes({"error": "Medicine not found"})
+
+
+# Medicine documents go straight to orjson, which writes NaN as null natively,
+# so there is no per-request jsonable_encoder / NaN-scrubbing pass over the tree.
+
+def fuzzy_hits(index, search_query: SearchQuery):
+    wanted = search_query.offset + search_query.limit
+    hits = index.search(search_query.query, wanted)
+    if len(hits) < wanted:
+        seen = {id(m) for m in hits}
+        for medicine in index.fuzzy_search(search_query.query, wanted, FUZZY_SEARCH_BUDGET_MS):
+            if id(medicine) not in seen:
+                hits.append(medicine)
+    return hits[search_query.offset:wanted]
+
+
+@router.post("/medicinesearch", response_class=OrjsonResponse)
 async def search(search_query: SearchQuery):
-    results = drug_fetch.search_medicine(search_query.query)
-    return {"results": results[:40]}
+    # Result lists carry summaries only; clients fetch /medicine/{slug} for details
+    index = drug_fetch.get_search_index()
+    if index:
+        # Served in-process from the trigram index built at startup
+        if search_query.fuzzy:
+            hits = fuzzy_hits(index, search_query)
+        else:
+            hits = index.search(search_query.query, search_query.limit, search_query.offset)
+        return OrjsonResponse({"results": [drug_fetch.summarize(m) for m in hits]})
+
+    # Index not built yet (or catalog failed to load) - fall back to MongoDB,
+    # which ranks and pages server-side (exact matches only)
+    results = await repo.run_sync(
+        drug_fetch.search_medicine, search_query.query, search_query.limit, search_query.offset
+    )
+    return OrjsonResponse({"results": results})
 
 
-@router.get("/medicine/{medicine_id}")
+@router.get("/medicines/autocomplete", response_class=OrjsonResponse)
+async def autocomplete(prefix: str = Query(..., max_length=100), limit: int = Query(10, ge=1, le=50)):
+    """Name + slug suggestions for type-ahead; cheap enough to call on every keystroke"""
+    index = drug_fetch.get_search_index()
+    if index:
+        return OrjsonResponse({"suggestions": index.prefixes.complete(prefix, limit)})
+
+    suggestions = await repo.run_sync(drug_fetch.autocomplete_medicine, prefix, limit)
+    return OrjsonResponse({"suggestions": suggestions})
+
+
+@router.get("/medicine/{medicine_id}", response_class=OrjsonResponse)
 async def get_medicine_details(medicine_id: str):
-    # Use unified database connection
-    medicine = db["medicines"].find_one({"slug": medicine_id}, {'_id': 0})
-    
-    if medicine:
-        return drug_fetch.clean_document(medicine)
-    return {"error": "Medicine not found"}
\ No newline at end of file
+    key = (drug_fetch.catalog_version(), medicine_id)
+    body = detail_cache.get(key)
+    if body is None:
+        # Use unified database connection
+        medicine = await repo.medicines.find_one({"slug": medicine_id}, drug_fetch.PUBLIC_PROJECTION)
+        body = json_bytes(medicine) if medicine else NOT_FOUND_BODY
+        detail_cache.set(key, body)
+    return Response(body, media_type="application/json")
+
+
+@router.get("/medicine/{medicine_id}/alternatives", response_class=OrjsonResponse)
+async def get_medicine_alternatives(medicine_id: str, limit: int = Query(50, ge=1, le=200)):
+    """Other brands with the same generic name, shortest names first"""
+    index = drug_fetch.get_search_index()
+    if index:
+        groups = drug_fetch.get_generic_groups()
+        if medicine_id not in groups:
+            raise HTTPException(status_code=404, detail="Medicine not found")
+        alternatives = [drug_fetch.summarize(m) for m in groups.alternatives(medicine_id)]
+    else:
+        # Index not built yet (or catalog failed to load) - group via the indexed generic_name_key instead
+        alternatives = await repo.run_sync(drug_fetch.find_alternatives, medicine_id)
+        if alternatives is None:
+            raise HTTPException(status_code=404, detail="Medicine not found")
+    return OrjsonResponse({"slug": medicine_id, "alternatives": alternatives[:limit]})
+
+
+@router.post("/medicines/batch", response_class=OrjsonResponse)
+async def get_medicines_batch(batch: BatchQuery):
+    """Details for many slugs in input order (null where missing), from one $in query at most"""
+    version = drug_fetch.catalog_version()
+    bodies = {slug: detail_cache.get((version, slug)) for slug in dict.fromkeys(batch.slugs)}
+
+    uncached = [slug for slug, body in bodies.items() if body is None]
+    if uncached:
+        medicines = await repo.medicines.find({"slug": {"$in": uncached}}, drug_fetch.PUBLIC_PROJECTION)
+        for medicine in medicines:
+            bodies[medicine["slug"]] = json_bytes(medicine)
+        for slug in uncached:
+            if bodies[slug] is None:
+                bodies[slug] = NOT_FOUND_BODY
+            detail_cache.set((version, slug), bodies[slug])
+
+    # Splice the cached JSON bodies together rather than re-serializing documents
+    missing = [slug for slug, body in bodies.items() if body is NOT_FOUND_BODY]
+    items = b",".join(b"null" if bodies[slug] is NOT_FOUND_BODY else bodies[slug] for slug in batch.slugs)
+    return Response(b'{"medicines":[' + items + b'],"missing":' + json_bytes(missing) + b"}", media_type="application/json")
+
+
+@router.get("/medicines/cache-stats")
+async def get_medicine_cache_stats():
+    """Hit/miss counters for the medicine detail cache"""
+    return {"catalog_version": drug_fetch.catalog_version(), **detail_cache.stats()}
\ No newline at end of file
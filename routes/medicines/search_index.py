@@ -0,0 +1,264 @@
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+# Names are compared on their first FUZZY_KEY_WIDTH characters in fuzzy mode
+FUZZY_KEY_WIDTH = 32
+FUZZY_MAX_CANDIDATES = 2000
+FUZZY_CHUNK = 256
+
+
+def normalize_name(value: Any) -> str:
+    """Lowercase, strip diacritics and collapse whitespace so names compare consistently"""
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+
+def shorter_name_length(medicine: Dict[str, Any]) -> int:
+    """Same ranking rule as the search pipeline: the shorter of medicine/generic name wins"""
+    medicine_name = medicine.get("medicine_name")
+    generic_name = medicine.get("generic_name")
+    return min(
+        len(str(medicine_name)) if medicine_name is not None else 0,
+        len(str(generic_name)) if generic_name is not None else 0,
+    )
+
+
+def search_keys(medicine: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields precomputed at import time so MongoDB search needs no per-match computation"""
+    return {
+        "medicine_name_key": normalize_name(medicine.get("medicine_name")),
+        "generic_name_key": normalize_name(medicine.get("generic_name")),
+        "shorter_length": shorter_name_length(medicine),
+    }
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def max_edits(length: int) -> int:
+    """Typos tolerated for a query of this length"""
+    return 1 if length <= 4 else 2 if length <= 8 else 3
+
+
+def prefix_edit_distances(query: str, names: np.ndarray) -> np.ndarray:
+    """Edit distance from `query` to the closest prefix of each row of `names`.
+
+    `names` holds one name per row as zero-padded code points. The DP runs one
+    query character at a time across all rows at once; the insertion pass is a
+    running minimum, so there is no Python loop over candidates or columns.
+    Prefix distance lets half-typed names ("amoxicil") match in full.
+    """
+    rows, width = names.shape
+    steps = np.arange(width + 1)
+    distances = np.broadcast_to(steps, (rows, width + 1))
+    for i, code in enumerate(map(ord, query), start=1):
+        current = np.empty((rows, width + 1), dtype=np.int32)
+        current[:, 0] = i
+        np.minimum(distances[:, :-1] + (names != code), distances[:, 1:] + 1, out=current[:, 1:])
+        distances = np.minimum.accumulate(current - steps, axis=1) + steps
+    return distances.min(axis=1)
+
+
+class PrefixIndex:
+    """Sorted array of normalized medicine and generic names for autocomplete.
+
+    Each distinct name is kept once, pointing at the best-ranked medicine that
+    carries it. A lookup is one bisect plus a scan over the matching run.
+    """
+
+    def __init__(self, ranked_medicines: List[Dict[str, Any]]):
+        entries: Dict[str, tuple] = {}
+        for medicine in ranked_medicines:
+            slug = medicine.get("slug")
+            if not slug:
+                continue
+            for field in ("medicine_name", "generic_name"):
+                name = medicine.get(field)
+                key = normalize_name(name)
+                if key and key not in entries:
+                    entries[key] = (str(name), slug)
+        self._keys = sorted(entries)
+        self._entries = [entries[key] for key in self._keys]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict[str, str]]:
+        """Up to `limit` names starting with `prefix`, alphabetically"""
+        needle = normalize_name(prefix)
+        if not needle or limit <= 0:
+            return []
+        suggestions = []
+        position = bisect_left(self._keys, needle)
+        while position < len(self._keys) and len(suggestions) < limit:
+            if not self._keys[position].startswith(needle):
+                break
+            name, slug = self._entries[position]
+            suggestions.append({"name": name, "slug": slug})
+            position += 1
+        return suggestions
+
+
+class GenericGroups:
+    """Medicines grouped by normalized generic name, for same-ingredient alternatives"""
+
+    def __init__(self, medicines: List[Dict[str, Any]]):
+        self._groups: Dict[str, List[Dict[str, Any]]] = {}
+        self._generic_of: Dict[str, str] = {}
+        for medicine in medicines:
+            slug = medicine.get("slug")
+            if not slug:
+                continue
+            key = normalize_name(medicine.get("generic_name"))
+            self._generic_of[slug] = key
+            if key:
+                self._groups.setdefault(key, []).append(medicine)
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._generic_of
+
+    def alternatives(self, slug: str) -> List[Dict[str, Any]]:
+        """Other medicines sharing `slug`'s generic name; empty for unknown slugs"""
+        key = self._generic_of.get(slug)
+        if not key:
+            return []
+        return [medicine for medicine in self._groups[key] if medicine.get("slug") != slug]
+
+
+class MedicineSearchIndex:
+    """Process-local trigram index over normalized medicine and generic names.
+
+    Documents are stored pre-sorted by the shortest-name rank, so every posting
+    list is already in rank order and a search can stop after the first `limit`
+    verified hits instead of sorting the whole match set.
+    """
+
+    def __init__(self, medicines: List[Dict[str, Any]], version: int = 0):
+        self.version = version
+        # Stable sort keeps catalog order for ties, like the old $sort did in practice
+        self._docs = sorted(medicines, key=shorter_name_length)
+        self._keys: List[tuple] = []
+        self._postings: Dict[str, array] = {}
+
+        for position, medicine in enumerate(self._docs):
+            keys = (
+                normalize_name(medicine.get("medicine_name")),
+                normalize_name(medicine.get("generic_name")),
+            )
+            self._keys.append(keys)
+            for gram in trigrams(keys[0]) | trigrams(keys[1]):
+                postings = self._postings.get(gram)
+                if postings is None:
+                    postings = self._postings[gram] = array("I")
+                postings.append(position)
+
+        # Rebuilt together with the trigram index whenever the catalog reloads
+        self.prefixes = PrefixIndex(self._docs)
+
+        # Code-point matrix for fuzzy scoring: row 2p is the medicine name of
+        # position p, row 2p + 1 its generic name
+        flat = [key for pair in self._keys for key in pair]
+        self._codes = np.array(flat or [""], dtype=f"<U{FUZZY_KEY_WIDTH}").view(np.uint32)
+        self._codes = self._codes.reshape(-1, FUZZY_KEY_WIDTH)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def ranked(self) -> List[Dict[str, Any]]:
+        """Catalog documents in search rank order"""
+        return self._docs
+
+    def _matches(self, position: int, needle: str) -> bool:
+        medicine_key, generic_key = self._keys[position]
+        return needle in medicine_key or needle in generic_key
+
+    def _candidates(self, needle: str):
+        if len(needle) < 3:
+            # One or two characters match most of the catalog, so a ranked scan
+            # with early exit is cheaper than any posting list
+            return range(len(self._docs))
+
+        # The rarest trigram bounds the candidate set; substring checks do the rest
+        rarest: Optional[array] = None
+        for gram in trigrams(needle):
+            postings = self._postings.get(gram)
+            if postings is None:
+                return ()
+            if rarest is None or len(postings) < len(rarest):
+                rarest = postings
+        return rarest
+
+    def search(self, query: str, limit: int = 40, offset: int = 0) -> List[Dict[str, Any]]:
+        """Return up to `limit` medicines whose names contain `query`, shortest names first,
+        skipping the first `offset` matches"""
+        needle = normalize_name(query)
+        results: List[Dict[str, Any]] = []
+        if limit <= 0:
+            return results
+
+        for position in self._candidates(needle):
+            if self._matches(position, needle):
+                if offset > 0:
+                    offset -= 1
+                    continue
+                results.append(self._docs[position])
+                if len(results) >= limit:
+                    break
+        return results
+
+    def _fuzzy_candidates(self, needle: str, edits: int) -> np.ndarray:
+        """Positions sharing enough trigrams with `needle`, most shared first"""
+        grams = trigrams(needle)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return np.empty(0, dtype=np.intp)
+
+        # Each edit breaks at most three trigrams of the query
+        shared = np.bincount(np.concatenate([np.frombuffer(p, dtype=np.uintc) for p in lists]))
+        candidates = np.flatnonzero(shared >= max(1, len(grams) - 3 * edits))
+        if len(candidates) > FUZZY_MAX_CANDIDATES:
+            candidates = candidates[np.argpartition(-shared[candidates], FUZZY_MAX_CANDIDATES)[:FUZZY_MAX_CANDIDATES]]
+        return candidates[np.argsort(-shared[candidates], kind="stable")]
+
+    def fuzzy_search(self, query: str, limit: int = 40, budget_ms: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Medicines whose medicine or generic name is within a few typos of `query`.
+
+        Ranked by edit distance, then by the usual shortest-name rank. Candidates
+        are scored in chunks, best trigram overlap first; once `budget_ms` is
+        spent the remaining chunks are skipped and the best hits so far returned.
+        """
+        started = time.perf_counter()
+        needle = normalize_name(query)[:FUZZY_KEY_WIDTH]
+        if len(needle) < 3 or limit <= 0:
+            return []
+
+        edits = max_edits(len(needle))
+        candidates = self._fuzzy_candidates(needle, edits)
+        width = min(FUZZY_KEY_WIDTH, len(needle) + edits)
+        hit_positions, hit_distances = [], []
+        for start in range(0, len(candidates), FUZZY_CHUNK):
+            chunk = candidates[start:start + FUZZY_CHUNK]
+            rows = np.stack([chunk * 2, chunk * 2 + 1], axis=1).ravel()
+            distances = prefix_edit_distances(needle, self._codes[rows, :width]).reshape(-1, 2).min(axis=1)
+            close = distances <= edits
+            hit_positions.append(chunk[close])
+            hit_distances.append(distances[close])
+            if budget_ms is not None and (time.perf_counter() - started) * 1000 >= budget_ms:
+                break
+
+        if not hit_positions:
+            return []
+        positions = np.concatenate(hit_positions)
+        order = np.lexsort((positions, np.concatenate(hit_distances)))[:limit]
+        return [self._docs[position] for position in positions[order]]
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+import re
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
 from auth.firebase_auth import get_current_user
-from config.database import db
+from config import repository as repo
+from utils.pagination import keyset_query, paginate
+from config.blob_store import blob_store, decode_image, detect_content_type, store_image
 from datetime import datetime
 from bson.objectid import ObjectId
 
@@ -13,14 +19,28 @@ class Prescription(BaseModel):
     date: str  # Date in ISO format (DD-MM-YYYY)
     diagnosis: str
     medicines: list[dict]  # List of medicines with their details
-    image: str  # Base64 encoded image string
+    image: str  # Base64 encoded image string (stored in the blob store, not the document)
     created_by: str  # Optional field to track who created the prescription
 
+# Only the fields the list endpoints return; keeps legacy inline images off the wire
+PRESCRIPTION_SUMMARY_PROJECTION = {"doctor_name": 1, "date": 1, "diagnosis": 1, "created_at": 1}
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def image_url(prescription_id: str) -> str:
+    return f"/prescription/{prescription_id}/image"
+
 @router.post("/add_prescription")
 async def add_prescription(prescription: Prescription, user_id: str = Depends(get_current_user)):
     try:
         # Use unified database connection
-        prescriptions_collection = db["prescriptions"]
+        prescriptions_collection = repo.prescriptions
+
+        # Store the image by content hash; the document only keeps the key
+        try:
+            image_key, image_size, image_content_type = await repo.run_sync(store_image, prescription.image)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         
         # Create a document to insert into MongoDB
         prescription_doc = {
@@ -30,13 +50,15 @@ async def add_prescription(prescription: Prescription, user_id: str = Depends(ge
             "date": prescription.date,  # Assuming date is in ISO format (DD-MM-YYYY)
             "diagnosis": prescription.diagnosis,
             "medicines": prescription.medicines,
-            "image": prescription.image,
+            "image_key": image_key,
+            "image_size": image_size,
+            "image_content_type": image_content_type,
             "created_by": prescription.created_by,
             "created_at": datetime.utcnow()
         }
         
         # Insert the document
-        result = prescriptions_collection.insert_one(prescription_doc)
+        result = await prescriptions_collection.insert_one(prescription_doc)
         
         # Return success response with the ID of the inserted document
         return {
@@ -49,8 +71,11 @@ async def add_prescription(prescription: Prescription, user_id: str = Depends(ge
             "medicines": prescription.medicines,
             "created_by": prescription.created_by,
             "created_at": prescription_doc["created_at"].strftime("%H:%M:%S"),
-            "user_id": user_id
+            "user_id": user_id,
+            "image_url": image_url(str(result.inserted_id))
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error adding prescription to MedicineAppDB: {e}")
         raise HTTPException(
@@ -59,17 +84,28 @@ async def add_prescription(prescription: Prescription, user_id: str = Depends(ge
         )
 
 @router.get("/prescriptions")
-async def get_prescriptions(user_id: str = Depends(get_current_user)):
+async def get_prescriptions(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    user_id: str = Depends(get_current_user),
+):
     try:
         # Use unified database connection
-        prescriptions_collection = db["prescriptions"]
+        prescriptions_collection = repo.prescriptions
         
-        # Query prescriptions for the authenticated user and sort by created_at in descending order
-        cursor = prescriptions_collection.find({"user_id": user_id}).sort("created_at", -1)
+        # Query one page of the user's prescriptions, newest first (keyset on created_at, _id)
+        query, sort = keyset_query({"user_id": user_id}, "created_at", cursor, descending=True)
+        docs = await prescriptions_collection.find(
+            query,
+            PRESCRIPTION_SUMMARY_PROJECTION,
+            sort=sort,
+            limit=limit + 1,
+        )
+        docs, next_cursor = paginate(docs, limit, "created_at")
         
         # Convert MongoDB documents to a list of dictionaries with only the requested fields
         prescriptions = []
-        for doc in cursor:
+        for doc in docs:
             # Extract only the needed fields
             prescription = {
                 "prescription_id": str(doc["_id"]),
@@ -82,8 +118,11 @@ async def get_prescriptions(user_id: str = Depends(get_current_user)):
             prescriptions.append(prescription)
         
         return {
-            "prescriptions": prescriptions
+            "prescriptions": prescriptions,
+            "next_cursor": next_cursor
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching prescriptions from MedicineAppDB: {e}")
         raise HTTPException(
@@ -92,64 +131,167 @@ async def get_prescriptions(user_id: str = Depends(get_current_user)):
         )
 
 
+def _accessible_by(prescription_id: str, user_id: str) -> dict:
+    return {
+        "_id": ObjectId(prescription_id),
+        "$or": [
+            {"user_id": user_id},          # owner
+            {"shared_with": user_id}       # has been shared with me
+        ]  # Security check to ensure user only accesses their own prescriptions
+    }
+
+
 @router.get("/prescription/{prescription_id}")
-async def get_prescription_by_id(prescription_id: str, user_id: str = Depends(get_current_user)):
+async def get_prescription_by_id(
+    prescription_id: str,
+    include_image: bool = Query(False, description="Inline the image as base64 (prefer image_url)"),
+    user_id: str = Depends(get_current_user),
+):
     try:
         # Use unified database connection
-        prescriptions_collection = db["prescriptions"]
+        prescriptions_collection = repo.prescriptions
         
         # Query the specific prescription
-        prescription = prescriptions_collection.find_one({
-            "_id": ObjectId(prescription_id),
-            "$or": [
-                {"user_id": user_id},          # owner
-                {"shared_with": user_id}       # has been shared with me
-            ]  # Security check to ensure user only accesses their own prescriptions
-        })
+        projection = None if include_image else {"image": 0}
+        prescription = await prescriptions_collection.find_one(
+            _accessible_by(prescription_id, user_id), projection
+        )
         
         if not prescription:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Prescription not found"
             )
+
+        if include_image and "image_key" in prescription and "image" not in prescription:
+            data = b"".join(await repo.run_sync(
+                lambda: list(blob_store.read_range(prescription["image_key"], 0, prescription["image_size"] - 1))
+            ))
+            prescription["image"] = base64.b64encode(data).decode()
         
         # Convert ObjectId to string
         prescription["_id"] = str(prescription["_id"])
+        prescription["image_url"] = image_url(prescription["_id"])
         # Convert datetime to string
         if "created_at" in prescription:
             prescription["created_at"] = prescription["created_at"].isoformat()
         
         return prescription
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching prescription from MedicineAppDB: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch prescription: {str(e)}"
         )
-    
+
+
+@router.get("/prescription/{prescription_id}/image")
+async def get_prescription_image(
+    prescription_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    user_id: str = Depends(get_current_user),
+):
+    """Stream the prescription image, honouring a single HTTP byte range"""
+    try:
+        prescription = await repo.prescriptions.find_one(
+            _accessible_by(prescription_id, user_id),
+            {"image_key": 1, "image_size": 1, "image_content_type": 1, "image": 1},
+        )
+    except Exception as e:
+        print(f"Error fetching prescription image from MedicineAppDB: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch prescription image: {str(e)}"
+        )
+
+    if not prescription or ("image_key" not in prescription and "image" not in prescription):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Prescription image not found")
+
+    if "image_key" in prescription:
+        size = prescription["image_size"]
+        content_type = prescription.get("image_content_type", "application/octet-stream")
+        read_range = lambda start, end: blob_store.read_range(prescription["image_key"], start, end)
+    else:
+        # Not migrated yet: the image is still inline in the document
+        data = decode_image(prescription["image"])
+        size = len(data)
+        content_type = detect_content_type(data)
+        read_range = lambda start, end: iter([data[start:end + 1]])
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=86400",
+    }
+    if "image_key" in prescription:
+        # Content-addressed, so the key is a perfect validator
+        headers["ETag"] = f'"{prescription["image_key"]}"'
+
+    match = _RANGE_RE.match(range_header.strip()) if range_header else None
+    if match and match.group(1) and match.group(2) and int(match.group(2)) < int(match.group(1)):
+        # last < first is not a valid range (RFC 7233), so the header is ignored
+        match = None
+    if not match or match.groups() == ("", ""):
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(read_range(0, size - 1), media_type=content_type, headers=headers)
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the final N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+
+    if start >= size or start > end:
+        return Response(
+            status_code=416,  # Range Not Satisfiable
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        read_range(start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=content_type,
+        headers=headers,
+    )
 
     
 @router.delete("/prescription/{prescription_id}")
 async def delete_prescription(prescription_id: str, user_id: str = Depends(get_current_user)):
     try:
         # Use unified database connection
-        prescriptions_collection = db["prescriptions"]
+        prescriptions_collection = repo.prescriptions
         
         # Delete the specific prescription
-        result = prescriptions_collection.delete_one({
+        deleted = await prescriptions_collection.find_one_and_delete({
             "_id": ObjectId(prescription_id),
             "user_id": user_id  # Security check to ensure user only deletes their own prescriptions
-        })
+        }, projection={"image_key": 1})
         
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Prescription not found or you do not have permission to delete it"
             )
+
+        # Images are shared by content hash, so only drop the blob once nothing
+        # references it; delete() keeps it if a concurrent upload claimed it
+        image_key = deleted.get("image_key")
+        if image_key:
+            checked_at = datetime.utcnow()
+            if not await prescriptions_collection.count_documents({"image_key": image_key}, limit=1):
+                await repo.run_sync(blob_store.delete, image_key, checked_at)
         
         return {
             "message": "Prescription deleted successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error deleting prescription from MedicineAppDB: {e}")
         raise HTTPException(
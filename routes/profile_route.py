@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from models.profile import Profile, ProfileCreate, ProfileUpdate
-from config.database import profile_collection
+from config import repository as repo
+from config.indexes import unique_index_verified
 from schema.schemas import profile_serializer
+from utils import profile_cache
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from auth.firebase_auth import get_current_user, get_current_user_with_email, get_current_user_auto_register
 from typing import Dict
 
@@ -14,12 +18,10 @@ router = APIRouter(
 
 # Auto-register and get user profile (main endpoint for login)
 @router.post("/auth-login", response_model=dict)
-async def auth_login(user_data: Dict[str, str] = Depends(get_current_user_auto_register)):
+async def auth_login(user_data: Dict = Depends(get_current_user_auto_register)):
     """Auto-register user if new, then return profile"""
-    user_id = user_data["user_id"]
-    
-    # Get the profile (should exist now due to auto-registration)
-    profile = profile_collection.find_one({"user_id": user_id})
+    # The dependency already holds the profile (found or just created)
+    profile = user_data["profile"]
     if not profile:
         raise HTTPException(
             status_code=500,
@@ -35,7 +37,7 @@ async def auth_login(user_data: Dict[str, str] = Depends(get_current_user_auto_r
 # Get user's profile
 @router.get("", response_model=dict)
 async def get_profile(user_id: str = Depends(get_current_user)):
-    profile = profile_collection.find_one({"user_id": user_id})
+    profile = await profile_cache.get_profile(user_id)
     if not profile:
         raise HTTPException(
             status_code=404, 
@@ -52,14 +54,6 @@ async def create_profile(
     user_id = user_data["user_id"]
     email = user_data["email"]
     
-    # Check if profile already exists
-    existing_profile = profile_collection.find_one({"user_id": user_id})
-    if existing_profile:
-        raise HTTPException(
-            status_code=400,
-            detail="Profile already exists for this user"
-        )
-    
     # Validate age if provided
     if profile.age is not None and (profile.age < 0 or profile.age > 150):
         raise HTTPException(
@@ -72,27 +66,43 @@ async def create_profile(
     profile_dict["user_id"] = user_id
     profile_dict["email"] = email
     
-    # Insert into database
-    result = profile_collection.insert_one(profile_dict)
+    # Without a confirmed unique user_id index a duplicate insert would succeed,
+    # so check first; once the index is verified it rejects the insert itself
+    index_verified = unique_index_verified("profiles", "user_id_1")
+    if not index_verified and await repo.profiles.count_documents({"user_id": user_id}, limit=1):
+        raise HTTPException(
+            status_code=400,
+            detail="Profile already exists for this user"
+        )
+    
+    # Insert into database; the unique user_id index rejects an existing profile
+    try:
+        await repo.profiles.insert_one(profile_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=400,
+            detail="Profile already exists for this user"
+        )
     
-    # Return created profile
-    created_profile = profile_collection.find_one({"_id": result.inserted_id})
-    return profile_serializer(created_profile)
+    # insert_one filled in _id, so the dict is the created profile
+    profile_cache.store(profile_dict)
+    return profile_serializer(profile_dict)
 
-# Update user profile
-@router.put("", response_model=dict)
-async def update_profile(profile: ProfileUpdate, user_id: str = Depends(get_current_user)):
-    # Check if profile exists
-    existing_profile = profile_collection.find_one({"user_id": user_id})
-    if not existing_profile:
+async def _require_profile(user_id: str) -> None:
+    """404 if the user has no profile; only used on error paths to keep 404 ahead of 400"""
+    if not await repo.profiles.count_documents({"user_id": user_id}, limit=1):
         raise HTTPException(
             status_code=404,
             detail="Profile not found"
         )
-    
+
+# Update user profile
+@router.put("", response_model=dict)
+async def update_profile(profile: ProfileUpdate, user_id: str = Depends(get_current_user)):
     # Update only provided fields
     update_dict = profile.model_dump(exclude_unset=True)
     if not update_dict:
+        await _require_profile(user_id)
         raise HTTPException(
             status_code=400,
             detail="No fields to update"
@@ -100,40 +110,45 @@ async def update_profile(profile: ProfileUpdate, user_id: str = Depends(get_curr
     
     # Validate age if provided
     if "age" in update_dict and update_dict["age"] is not None and (update_dict["age"] < 0 or update_dict["age"] > 150):
+        await _require_profile(user_id)
         raise HTTPException(
             status_code=400,
             detail="Invalid age. Age must be between 0 and 150."
         )
     
-    # Update profile
-    profile_collection.update_one(
+    # Update profile and get the result back in the same round trip
+    updated_profile = await repo.profiles.find_one_and_update(
         {"user_id": user_id},
-        {"$set": update_dict}
+        {"$set": update_dict},
+        return_document=ReturnDocument.AFTER,
     )
+    if not updated_profile:
+        raise HTTPException(
+            status_code=404,
+            detail="Profile not found"
+        )
     
-    # Return updated profile
-    updated_profile = profile_collection.find_one({"user_id": user_id})
+    profile_cache.store(updated_profile)
     return profile_serializer(updated_profile)
 
 # Delete user profile
 @router.delete("", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_profile(user_id: str = Depends(get_current_user)):
-    # Check if profile exists
-    existing_profile = profile_collection.find_one({"user_id": user_id})
-    if not existing_profile:
+    # Delete profile; no match means there was nothing to delete
+    deleted_profile = await repo.profiles.find_one_and_delete({"user_id": user_id}, projection={"_id": 1})
+    if not deleted_profile:
         raise HTTPException(
             status_code=404,
             detail="Profile not found"
         )
     
-    # Delete profile
-    profile_collection.delete_one({"user_id": user_id})
+    profile_cache.invalidate(user_id)
     return {"message": "Profile deleted successfully"}
 
 # Get profile by email (for admin purposes)
 @router.get("/by-email/{email}")
 async def get_profile_by_email(email: str, user_id: str = Depends(get_current_user)):
-    profile = profile_collection.find_one({"email": email})
+    profile = await repo.profiles.find_one({"email": email})
     if not profile:
         raise HTTPException(
             status_code=404,
@@ -143,7 +158,12 @@ async def get_profile_by_email(email: str, user_id: str = Depends(get_current_us
 
 @router.get("/public/{user_id}", response_model=dict)
 async def get_public_profile(user_id: str):
-    profile = profile_collection.find_one({"user_id": user_id})
+    profile = await profile_cache.get_profile(user_id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
-    return profile_serializer(profile)
\ No newline at end of file
+    return profile_serializer(profile)
+
+@router.get("/cache-stats")
+async def get_profile_cache_stats():
+    """Hit/miss and write-through counters for the shared profile cache"""
+    return profile_cache.stats()
\ No newline at end of file
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from auth.firebase_auth import get_current_user
-from config.database import db
+from config import repository as repo
 from datetime import datetime
 from bson import ObjectId
 
@@ -16,13 +16,13 @@ async def receive_prescription(
     data: PrescriptionIn,
     user_id: str = Depends(get_current_user),
 ):
-    rec_coll  = db["recieved_prescription"]
-    pres_coll = db["prescriptions"]
+    rec_coll  = repo.recieved_prescriptions
+    pres_coll = repo.prescriptions
     now       = datetime.utcnow()
 
     try:
         # 1) Upsert into recieved_prescription
-        result = rec_coll.update_one(
+        result = await rec_coll.update_one(
             {"user_id": user_id},
             {
                 "$setOnInsert": {
@@ -37,7 +37,7 @@ async def receive_prescription(
 
         # 2) Also tag the original prescription itself
         #    by adding this user to its `shared_with` array
-        pres_coll.update_one(
+        await pres_coll.update_one(
             {"_id": ObjectId(data.prescription_id)},
             {"$addToSet": {"shared_with": user_id}}
         )
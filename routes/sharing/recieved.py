@@ -2,7 +2,9 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from auth.firebase_auth import get_current_user
-from config.database import db
+from config import repository as repo
+from schema.serializers import Projection, list_response
+from utils.profile_cache import get_profiles
 from datetime import datetime
 from bson import ObjectId
 
@@ -16,6 +18,13 @@ class ReceivedPrescriptionOut(BaseModel):
     created_at: Optional[datetime]
     owner_name: Optional[str]
 
+received_out = Projection(
+    ReceivedPrescriptionOut,
+    sources={"prescription_id": "_id"},
+    converters={"prescription_id": str},
+    computed=("owner_name",),
+)
+
 @router.get(
     "/recievedPrescription",
     response_model=List[ReceivedPrescriptionOut],
@@ -24,34 +33,39 @@ class ReceivedPrescriptionOut(BaseModel):
 async def list_received_prescriptions(
     user_id: str = Depends(get_current_user)
 ) -> List[ReceivedPrescriptionOut]:
-    rec_doc = db["recieved_prescription"].find_one({"user_id": user_id})
+    rec_doc = await repo.recieved_prescriptions.find_one({"user_id": user_id})
     if not rec_doc:
         return []
 
-    pres_coll = db["prescriptions"]
-    prof_coll = db["profiles"]
-    out: List[ReceivedPrescriptionOut] = []
-
+    # Batched reads (owners via the profile cache) instead of one prescription + one profile lookup per id
+    pids = []
     for pid_str in rec_doc.get("prescription_id", []):
         try:
-            pid = ObjectId(pid_str)
+            pids.append(ObjectId(pid_str))
         except:
             continue
+    if not pids:
+        return []
 
-        pres = pres_coll.find_one({"_id": pid})
+    prescriptions = await repo.prescriptions.find(
+        {"_id": {"$in": pids}},
+        {**received_out.mongo, "user_id": 1},
+    )
+    by_id = {pres["_id"]: pres for pres in prescriptions}
+
+    owners = await get_profiles(pres["user_id"] for pres in prescriptions if pres.get("user_id"))
+    owner_names = {uid: profile.get("name", "") for uid, profile in owners.items() if profile}
+
+    out = []
+
+    # Keep the order in which prescriptions were received
+    for pid in pids:
+        pres = by_id.get(pid)
         if not pres:
             continue
 
-        profile    = prof_coll.find_one({"user_id": pres.get("user_id")}) or {}
-        owner_name = profile.get("name", "")
-
-        out.append(ReceivedPrescriptionOut(
-            prescription_id=str(pres["_id"]),
-            doctor_name   = pres.get("doctor_name"),
-            date          = pres.get("date"),
-            diagnosis     = pres.get("diagnosis"),
-            created_at    = pres.get("created_at"),
-            owner_name    = owner_name,
-        ))
+        item = received_out(pres)
+        item["owner_name"] = owner_names.get(pres.get("user_id"), "")
+        out.append(item)
 
-    return out
+    return list_response(out)
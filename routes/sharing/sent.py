@@ -2,7 +2,9 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from auth.firebase_auth import get_current_user
-from config.database import db
+from config import repository as repo
+from utils.profile_cache import resolve_names
+from schema.serializers import Projection, list_response
 from datetime import datetime
 from bson import ObjectId
 
@@ -20,6 +22,13 @@ class SentPrescriptionOut(BaseModel):
     created_at: Optional[datetime]
     recipients: List[Recipient]
 
+sent_out = Projection(
+    SentPrescriptionOut,
+    sources={"prescription_id": "_id"},
+    converters={"prescription_id": str},
+    computed=("recipients",),
+)
+
 @router.get(
     "/sentPrescriptions",
     response_model=List[SentPrescriptionOut],
@@ -28,33 +37,26 @@ class SentPrescriptionOut(BaseModel):
 async def list_sent_prescriptions(
     user_id: str = Depends(get_current_user)
 ) -> List[SentPrescriptionOut]:
-    pres_coll = db["prescriptions"]
-    prof_coll = db["profiles"]
+    pres_coll = repo.prescriptions
 
     # Find all my prescriptions that have at least one share
-    cursor = pres_coll.find({
+    cursor = await pres_coll.find({
         "user_id": user_id,
         "shared_with": {"$exists": True, "$ne": []}
-    })
+    }, {**sent_out.mongo, "shared_with": 1})
+
+    # Resolve every recipient once, in a single batched (and cached) lookup
+    names = await resolve_names(
+        uid for pres in cursor for uid in pres.get("shared_with", [])
+    )
 
-    out: List[SentPrescriptionOut] = []
-    # Use a regular (synchronous) for-loop over the cursor
+    out = []
     for pres in cursor:
-        recips: List[Recipient] = []
-        for uid in pres.get("shared_with", []):
-            profile = prof_coll.find_one({"user_id": uid}) or {}
-            recips.append(Recipient(
-                user_id=uid,
-                name=profile.get("name")
-            ))
-
-        out.append(SentPrescriptionOut(
-            prescription_id=str(pres["_id"]),
-            doctor_name   = pres.get("doctor_name"),
-            date          = pres.get("date"),
-            diagnosis     = pres.get("diagnosis"),
-            created_at    = pres.get("created_at"),
-            recipients    = recips,
-        ))
-
-    return out
+        item = sent_out(pres)
+        item["recipients"] = [
+            {"user_id": uid, "name": names.get(uid)}
+            for uid in pres.get("shared_with", [])
+        ]
+        out.append(item)
+
+    return list_response(out)
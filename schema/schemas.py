@@ -1,19 +1,15 @@
+from models.profile import Profile
+from schema.serializers import Projection
+
+profile_projection = Projection(
+    Profile,
+    sources={"id": "_id"},
+    converters={"id": str},
+    defaults={"name": ""},
+)
+
 def profile_serializer(profile) -> dict:
-    return {
-        "id": str(profile["_id"]),
-        "user_id": profile["user_id"],
-        "email": profile.get("email"),
-        "name": profile.get("name", ""),
-        "age": profile.get("age"),
-        "address": profile.get("address"),
-        "gender": profile.get("gender"),
-        "phone": profile.get("phone"),
-        "date_of_birth": profile.get("date_of_birth"),
-        "blood_type": profile.get("blood_type"),
-        "allergies": profile.get("allergies"),
-        "medical_conditions": profile.get("medical_conditions"),
-        "emergency_contact": profile.get("emergency_contact")
-    }
+    return profile_projection(profile)
 
 def profile_list_serializer(profiles) -> list:
-    return [profile_serializer(profile) for profile in profiles]
\ No newline at end of file
+    return profile_projection.many(profiles)
\ No newline at end of file
@@ -0,0 +1,78 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+class Projection:
+    """Field plan from raw BSON documents to one response model's JSON shape.
+
+    Built once per model: which source key feeds each output field, plus an
+    optional converter (e.g. ObjectId -> str). `mongo` is the matching find()
+    projection so only needed fields cross the wire. Fields listed in
+    `computed` are filled in by the route and skipped here.
+    """
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        sources: Optional[Dict[str, str]] = None,
+        converters: Optional[Dict[str, Callable[[Any], Any]]] = None,
+        defaults: Optional[Dict[str, Any]] = None,
+        computed: Iterable[str] = (),
+    ):
+        sources = sources or {}
+        converters = converters or {}
+        defaults = defaults or {}
+        self.model = model
+        self._plan = []
+        for name, field in model.model_fields.items():
+            if name in computed:
+                continue
+            if name in defaults:
+                default = defaults[name]
+            else:
+                default = None if field.is_required() else field.default
+            self._plan.append((name, sources.get(name, name), converters.get(name), default))
+        self.mongo = {source: 1 for _, source, _, _ in self._plan}
+
+    def __call__(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        out = {}
+        for name, source, convert, default in self._plan:
+            value = doc.get(source, default)
+            out[name] = convert(value) if convert is not None and value is not None else value
+        return out
+
+    def many(self, docs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self(doc) for doc in docs]
+
+
+def json_bytes(content: Any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class OrjsonResponse(JSONResponse):
+    """JSONResponse rendered by orjson, which writes float NaN as null.
+
+    Stands in for FastAPI's deprecated ORJSONResponse.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return json_bytes(content)
+
+
+def list_response(items: List[Dict[str, Any]], response: Optional[Response] = None) -> Response:
+    """Serialize already-shaped list output directly, without response_model validation.
+
+    Only for items built by a Projection of the route's response_model (or
+    equally shaped dicts): the projection already guarantees the field set,
+    so re-validating every item would only duplicate work. The route's
+    response_model still documents the shape in OpenAPI.
+
+    Pass the route's injected `response` so headers set on it are kept.
+    """
+    out = Response(json_bytes(items), media_type="application/json")
+    if response is not None:
+        for key, value in response.headers.items():
+            if key != "content-length":
+                out.headers[key] = value
+    return out
@@ -0,0 +1,101 @@
+"""Latency benchmark for fuzzy medicine search over the full catalog.
+
+Usage:
+    python -m scripts.benchmark_fuzzy_search [--queries 1000] [--target-ms 50]
+    python -m scripts.benchmark_fuzzy_search --synthetic 30000
+
+Misspells real catalog names (random insert/delete/substitute/transpose),
+times MedicineSearchIndex.fuzzy_search per query, and reports p50/p95/p99
+plus how often the misspelled medicine came back. Exits 1 when p99 is over
+the target, so it can gate a deploy.
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from typing import Any, Dict, List
+from routes.medicines.search_index import MedicineSearchIndex, normalize_name
+
+
+def synthetic_catalog(size: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    syllables = ["am", "ox", "ci", "lin", "pa", "ra", "ce", "ta", "mol", "me", "pra", "zole", "na", "fex", "o", "dine", "cef", "ur", "ox", "ime"]
+    generics = ["".join(rng.choice(syllables) for _ in range(rng.randint(3, 5))) for _ in range(max(1, size // 20))]
+    catalog = []
+    for i in range(size):
+        brand = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).title()
+        catalog.append({"medicine_name": f"{brand} {rng.choice(['250', '500', 'Plus', 'DS', ''])}".strip(), "generic_name": rng.choice(generics), "slug": f"med-{i}"})
+    return catalog
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    chars = list(name)
+    position = rng.randrange(len(chars))
+    operation = rng.choice(["insert", "delete", "substitute", "transpose"])
+    if operation == "insert":
+        chars.insert(position, rng.choice(string.ascii_lowercase))
+    elif operation == "delete" and len(chars) > 3:
+        del chars[position]
+    elif operation == "transpose" and position + 1 < len(chars):
+        chars[position], chars[position + 1] = chars[position + 1], chars[position]
+    else:
+        chars[position] = rng.choice(string.ascii_lowercase)
+    return "".join(chars)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(catalog: List[Dict[str, Any]], queries: int, budget_ms: float, limit: int, seed: int = 11) -> Dict[str, float]:
+    started = time.perf_counter()
+    index = MedicineSearchIndex(catalog)
+    build_seconds = time.perf_counter() - started
+
+    rng = random.Random(seed)
+    timings, found = [], 0
+    named = [m for m in catalog if len(normalize_name(m.get("medicine_name"))) >= 5]
+    for _ in range(queries):
+        medicine = rng.choice(named)
+        query = misspell(normalize_name(rng.choice([medicine.get("medicine_name"), medicine.get("generic_name")]) or medicine["medicine_name"]), rng)
+        started = time.perf_counter()
+        results = index.fuzzy_search(query, limit, budget_ms)
+        timings.append((time.perf_counter() - started) * 1000)
+        found += any(r.get("slug") == medicine.get("slug") or r.get("generic_name") == medicine.get("generic_name") for r in results)
+
+    return {
+        "catalog": len(catalog),
+        "build_seconds": round(build_seconds, 2),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "max_ms": round(max(timings), 3),
+        "recall": round(found / queries, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=40)
+    parser.add_argument("--budget-ms", type=float, default=25.0, help="Per-query scoring budget (FUZZY_SEARCH_BUDGET_MS)")
+    parser.add_argument("--target-ms", type=float, default=50.0, help="p99 typeahead target")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N generated medicines instead of the database")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        medicines = synthetic_catalog(args.synthetic)
+    else:
+        from routes.medicines.drug_fetch import load_medicines
+        medicines = load_medicines()
+    if not medicines:
+        sys.exit("❌ No medicines to benchmark")
+
+    result = run(medicines, args.queries, args.budget_ms, args.limit)
+    print(result)
+    if result["p99_ms"] > args.target_ms:
+        print(f"❌ p99 {result['p99_ms']}ms is over the {args.target_ms}ms target")
+        sys.exit(1)
+    print(f"✅ p99 {result['p99_ms']}ms is within the {args.target_ms}ms target")
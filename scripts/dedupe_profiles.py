@@ -0,0 +1,75 @@
+"""Make profiles.user_id unique: delete duplicate profiles and replace the old non-unique index.
+
+Usage:
+    python -m scripts.dedupe_profiles [--dry-run]
+
+Earlier releases indexed profiles.user_id without `unique`, so concurrent
+first logins could store several profiles for one user, and the app now
+refuses to start because the unique index of the same name cannot be built.
+For each duplicated user_id the most complete profile (most non-empty
+fields, oldest on ties) is kept and the others are deleted; then the
+non-unique user_id_1 index is dropped and the unique one created. Run it
+with the app stopped, or re-run it if new duplicates slip in meanwhile.
+Safe to re-run.
+"""
+import argparse
+import sys
+from typing import Any, Dict
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from config.database import profile_collection
+from config.indexes import INDEXES
+
+INDEX_NAME = "user_id_1"
+
+
+def completeness(profile: Dict[str, Any]) -> int:
+    return sum(1 for key, value in profile.items() if key != "_id" and value not in (None, ""))
+
+
+def dedupe(dry_run: bool) -> int:
+    """Delete all but one profile per user_id; returns profiles deleted (or to delete)"""
+    groups = profile_collection.aggregate([
+        {"$group": {"_id": "$user_id", "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ], allowDiskUse=True)
+    deleted = 0
+    for group in groups:
+        profiles = sorted(profile_collection.find({"_id": {"$in": group["ids"]}}), key=lambda p: p["_id"])
+        keep = max(profiles, key=completeness)  # first of the most complete, i.e. the oldest
+        extra = [p["_id"] for p in profiles if p["_id"] != keep["_id"]]
+        print(f"… user_id {group['_id']!r}: keeping {keep['_id']}, deleting {len(extra)}")
+        if not dry_run:
+            profile_collection.delete_many({"_id": {"$in": extra}})
+        deleted += len(extra)
+    return deleted
+
+
+def make_unique(dry_run: bool) -> bool:
+    existing = profile_collection.index_information().get(INDEX_NAME)
+    if existing and existing.get("unique"):
+        print(f"✅ {INDEX_NAME} is already unique")
+        return True
+    if dry_run:
+        print(f"… would {'replace' if existing else 'create'} {INDEX_NAME} as a unique index")
+        return True
+
+    model = next(m for m in INDEXES["profiles"] if m.document["name"] == INDEX_NAME)
+    if existing:
+        profile_collection.drop_index(INDEX_NAME)
+    try:
+        profile_collection.create_indexes([model])
+    except (DuplicateKeyError, OperationFailure) as e:
+        print(f"❌ Could not create the unique {INDEX_NAME} (new duplicates?), re-run: {e}")
+        return False
+    print(f"✅ Created unique {INDEX_NAME}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    deleted = dedupe(args.dry_run)
+    print(f"{'… would delete' if args.dry_run else '✅ Deleted'} {deleted} duplicate profiles")
+    sys.exit(0 if make_unique(args.dry_run) else 1)
@@ -0,0 +1,118 @@
+"""Stream a medicine catalog (CSV or JSONL) into the medicines collection.
+
+Usage:
+    python -m scripts.import_medicines catalog.csv [--batch-size 1000] [--numeric price,pack_size]
+    python -m scripts.import_medicines catalog.jsonl
+
+Rows are upserted on `slug` in bounded batches, so memory stays flat for any
+catalog size and re-importing the same file is idempotent. Each row is
+normalized (NaN/blank -> null, optional numeric columns) and gets the
+precomputed search fields used by drug_fetch.search_medicine.
+"""
+import argparse
+import csv
+import json
+import math
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+from pymongo import UpdateOne
+from config.database import medicine_collection
+from routes.medicines.drug_fetch import clean_document
+from routes.medicines.search_index import search_keys
+
+NULL_STRINGS = {"", "nan", "null", "none", "n/a"}
+
+
+def read_rows(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def to_number(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            number = float(value.replace(",", ""))
+        except ValueError:
+            return value
+        return int(number) if number.is_integer() else number
+    return value
+
+
+def normalize_row(row: Dict[str, Any], numeric: Set[str]) -> Dict[str, Any]:
+    doc = {}
+    for key, value in row.items():
+        if key is None:
+            continue  # overflow columns from a malformed CSV line
+        key = key.strip()
+        if isinstance(value, str):
+            value = value.strip()
+            if value.lower() in NULL_STRINGS:
+                value = None
+        elif isinstance(value, float) and math.isnan(value):
+            value = None
+        if key in numeric and value is not None:
+            value = to_number(value)
+        doc[key] = value
+    doc = clean_document(doc)
+    doc.update(search_keys(doc))
+    return doc
+
+
+def batches(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_catalog(path: str, batch_size: int = 1000, numeric: Optional[Set[str]] = None) -> Dict[str, Any]:
+    numeric = numeric or set()
+    stats = {"rows": 0, "upserted": 0, "modified": 0, "rejected": 0}
+    started = time.perf_counter()
+
+    for batch in batches(read_rows(path), batch_size):
+        ops = []
+        now = datetime.utcnow()
+        for row in batch:
+            stats["rows"] += 1
+            doc = normalize_row(row, numeric)
+            if not doc.get("slug"):
+                stats["rejected"] += 1
+                continue
+            doc["updated_at"] = now  # Lets polling watchers see in-place edits
+            ops.append(UpdateOne({"slug": doc["slug"]}, {"$set": doc}, upsert=True))
+        if ops:
+            result = medicine_collection.bulk_write(ops, ordered=False)
+            stats["upserted"] += result.upserted_count
+            stats["modified"] += result.modified_count
+
+        elapsed = time.perf_counter() - started
+        print(f"… {stats['rows']} rows ({stats['rows'] / elapsed:,.0f} rows/s)")
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["rows_per_second"] = round(stats["rows"] / elapsed) if elapsed else stats["rows"]
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="CSV file, or .jsonl/.ndjson with one medicine per line")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--numeric", default="", help="Comma-separated columns to convert to numbers")
+    args = parser.parse_args()
+
+    numeric_columns = {c.strip() for c in args.numeric.split(",") if c.strip()}
+    result = import_catalog(args.path, batch_size=args.batch_size, numeric=numeric_columns)
+    print(f"✅ Import finished: {result}")
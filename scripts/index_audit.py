@@ -0,0 +1,55 @@
+"""Explain every canonical query and fail if any falls back to a COLLSCAN or an in-memory SORT.
+
+Usage:
+    python -m scripts.index_audit [--ensure]
+
+--ensure creates the registered indexes first. Exits with status 1 when a
+query is not fully served by an index, so it can gate a deploy.
+"""
+import argparse
+import sys
+from typing import Any, Iterator
+from config.database import db
+from config.indexes import CANONICAL_QUERIES, ensure_indexes
+
+BAD_STAGES = {"COLLSCAN", "SORT"}
+
+
+def plan_stages(plan: Any) -> Iterator[str]:
+    """Yield every stage name in a (possibly nested) explain plan"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+def audit() -> bool:
+    ok = True
+    for query in CANONICAL_QUERIES:
+        cursor = db[query["collection"]].find(query["filter"])
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+        if query.get("limit"):
+            cursor = cursor.limit(query["limit"])
+
+        winning_plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        stages = list(plan_stages(winning_plan))
+        bad = BAD_STAGES.intersection(stages)
+        status = "❌" if bad else "✅"
+        print(f"{status} {query['name']:<32} {query['collection']:<22} {' <- '.join(stages)}")
+        ok = ok and not bad
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ensure", action="store_true", help="Create registered indexes before auditing")
+    args = parser.parse_args()
+
+    if args.ensure:
+        ensure_indexes(db)
+    sys.exit(0 if audit() else 1)
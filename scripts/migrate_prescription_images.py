@@ -0,0 +1,65 @@
+"""Move inline base64 prescription images into the blob store.
+
+Usage:
+    python -m scripts.migrate_prescription_images [--batch-size 100] [--dry-run]
+
+Safe to re-run: only documents that still carry an inline `image` are touched,
+and blobs are content-addressed so a retried upload is a no-op.
+"""
+import argparse
+import time
+from config.database import prescription_collection
+from config.blob_store import store_image
+
+
+def migrate(batch_size: int = 100, dry_run: bool = False) -> dict:
+    stats = {"migrated": 0, "failed": 0, "bytes": 0}
+    started = time.perf_counter()
+    last_id = None
+
+    while True:
+        # Page by _id so the scan stays cheap and resumable
+        query = {"image": {"$type": "string"}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(
+            prescription_collection.find(query, {"image": 1}).sort("_id", 1).limit(batch_size)
+        )
+        if not batch:
+            break
+
+        for doc in batch:
+            last_id = doc["_id"]
+            try:
+                key, size, content_type = store_image(doc["image"]) if not dry_run else (None, 0, None)
+            except ValueError as e:
+                print(f"❌ {doc['_id']}: {e}")
+                stats["failed"] += 1
+                continue
+
+            if not dry_run:
+                # Only unset the image we actually stored, in case it changed meanwhile
+                prescription_collection.update_one(
+                    {"_id": doc["_id"], "image": doc["image"]},
+                    {
+                        "$set": {"image_key": key, "image_size": size, "image_content_type": content_type},
+                        "$unset": {"image": ""},
+                    },
+                )
+            stats["migrated"] += 1
+            stats["bytes"] += size
+
+        print(f"… {stats['migrated']} migrated, {stats['failed']} failed")
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true", help="Only count documents that would be migrated")
+    args = parser.parse_args()
+
+    result = migrate(batch_size=args.batch_size, dry_run=args.dry_run)
+    print(f"✅ Done: {result}")
@@ -0,0 +1,40 @@
+"""Rewrite NaN values in the medicines collection as null, once, at the source,
+and backfill the precomputed search fields used by drug_fetch.search_medicine.
+
+Usage:
+    python -m scripts.normalize_medicines
+
+After this backfill the API never has to scrub NaN per request or compute
+name lengths per search; new data gets both from scripts/import_medicines.py.
+Safe to re-run.
+"""
+from datetime import datetime
+from pymongo import UpdateOne
+from config.database import medicine_collection
+from routes.medicines.drug_fetch import nan_paths
+from routes.medicines.search_index import search_keys
+
+BATCH_SIZE = 500
+
+
+def normalize() -> int:
+    fixed = 0
+    ops = []
+    for doc in medicine_collection.find({}):
+        updates = {path: None for path in nan_paths(doc)}
+        for key, value in search_keys(doc).items():
+            if doc.get(key) != value:
+                updates[key] = value
+        if updates:
+            updates["updated_at"] = datetime.utcnow()
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": updates}))
+        if len(ops) >= BATCH_SIZE:
+            fixed += medicine_collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        fixed += medicine_collection.bulk_write(ops, ordered=False).modified_count
+    return fixed
+
+
+if __name__ == "__main__":
+    print(f"✅ Normalized {normalize()} medicine documents")
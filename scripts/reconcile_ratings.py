@@ -0,0 +1,17 @@
+"""Recompute average_ratings (sum, count, histogram, average) from the reviews collection.
+
+Usage:
+    python -m scripts.reconcile_ratings
+
+Startup applies this once per database (config/migrations.py): older
+documents only carry a client-supplied average, and were kept per
+displayName, so a subject may have several; all but one are deleted.
+Run it by hand whenever drift is suspected.
+"""
+import time
+from routes.Reviews.ratings import reconcile_ratings
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    written = reconcile_ratings()
+    print(f"✅ Reconciled {written} rating aggregates in {time.perf_counter() - started:.2f}s")
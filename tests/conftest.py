@@ -0,0 +1,44 @@
+"""The app runs in-process against mongomock with local auth (see benchmarks/environment.py).
+
+prepare() must run before main or config.database is imported.
+"""
+from benchmarks.environment import prepare
+
+prepare()
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from benchmarks.local_auth import sign  # noqa: E402
+from config.database import db  # noqa: E402
+from main import app  # noqa: E402
+from utils import profile_cache  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def database(client):
+    """The app's database, emptied (indexes kept) and with cold caches"""
+    for name in db.list_collection_names():
+        db[name].delete_many({})
+    profile_cache._profiles.clear()
+    return db
+
+
+@pytest.fixture
+def auth():
+    def headers(user_id: str) -> dict:
+        return {"Authorization": f"Bearer {sign(user_id)}"}
+    return headers
+
+
+@pytest.fixture
+def db_queries():
+    def count(response) -> int:
+        """MongoDB commands the request issued, as reported by the metrics middleware"""
+        return int(response.headers["X-DB-Queries"])
+    return count
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from config.migrations import run_migrations
+
+
+def walk(client, url, headers=None, **params):
+    """Follow next cursors to the end and return every item seen"""
+    items, cursor = [], None
+    while True:
+        response = client.get(url, headers=headers, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.json()
+        if isinstance(body, dict):
+            items.extend(body["prescriptions"])
+            cursor = body["next_cursor"]
+        else:
+            items.extend(body)
+            cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return items
+
+
+def test_default_messages_page_includes_newest(client, database):
+    start = datetime.utcnow() - timedelta(hours=1)
+    database.messages.insert_many([
+        {"sender_id": "u", "content": f"old {i}", "timestamp": start + timedelta(seconds=i)} for i in range(150)
+    ])
+    sent = client.post("/messages/", json={"sender_id": "u", "content": "newest"}).json()
+
+    page = client.get("/messages/").json()
+
+    assert len(page) == 100
+    assert page[-1]["id"] == sent["id"]
+    assert [m["timestamp"] for m in page] == sorted(m["timestamp"] for m in page)
+    assert len({m["id"] for m in walk(client, "/messages/", limit=40)}) == 151
+    assert len(walk(client, "/messages/", since=start.isoformat(), limit=40)) == 150
+
+
+def test_cursor_walk_reaches_documents_without_created_at(client, database, auth):
+    now = datetime.utcnow()
+    base = {"user_id": "owner", "doctor_name": "Dr Test", "date": "01-01-2025", "diagnosis": "test"}
+    database.prescriptions.insert_many([{**base, "created_at": now - timedelta(days=i)} for i in range(5)])
+    database.prescriptions.insert_one(dict(base))  # legacy document
+    run_migrations(database)
+
+    walked = walk(client, "/prescriptions", headers=auth("owner"), limit=2)
+
+    assert len({p["prescription_id"] for p in walked}) == 6
@@ -0,0 +1,39 @@
+"""Round trips per profile endpoint; a regression here usually means an extra read crept in"""
+from config import indexes
+
+PROFILE = {"name": "Test User", "gender": "Female", "phone": "01700000000"}
+
+
+def test_auth_login_registers_in_one_command_then_uses_the_cache(client, database, auth, db_queries):
+    first = client.post("/profile/auth-login", headers=auth("new-user"))
+    again = client.post("/profile/auth-login", headers=auth("new-user"))
+
+    assert first.status_code == again.status_code == 200
+    assert first.json()["profile"]["user_id"] == "new-user"
+    assert (db_queries(first), db_queries(again)) == (1, 0)
+    assert database.profiles.count_documents({"user_id": "new-user"}) == 1
+
+
+def test_create_update_delete_one_command_each(client, database, auth, db_queries):
+    headers = auth("crud-user")
+
+    created = client.post("/profile", json=PROFILE, headers=headers)
+    duplicate = client.post("/profile", json=PROFILE, headers=headers)
+    fetched = client.get("/profile", headers=headers)
+    updated = client.put("/profile", json={"age": 30}, headers=headers)
+    deleted = client.delete("/profile", headers=headers)
+
+    assert [r.status_code for r in (created, duplicate, fetched, updated, deleted)] == [201, 400, 200, 200, 204]
+    assert updated.json()["age"] == 30
+    assert [db_queries(r) for r in (created, duplicate, fetched, updated, deleted)] == [1, 1, 0, 1, 1]
+
+
+def test_create_checks_for_duplicates_until_the_unique_index_is_verified(client, database, auth, db_queries, monkeypatch):
+    monkeypatch.setattr(indexes, "_verified_unique", set())
+    headers = auth("unverified-user")
+
+    created = client.post("/profile", json=PROFILE, headers=headers)
+    duplicate = client.post("/profile", json=PROFILE, headers=headers)
+
+    assert (created.status_code, duplicate.status_code) == (201, 400)
+    assert (db_queries(created), db_queries(duplicate)) == (2, 1)
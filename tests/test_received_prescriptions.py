@@ -0,0 +1,33 @@
+from datetime import datetime
+
+
+def share_prescriptions(database, recipient: str, count: int) -> None:
+    """`count` prescriptions from `count` different owners, all shared with `recipient`"""
+    owners = [f"{recipient}-owner-{i}" for i in range(count)]
+    database.profiles.insert_many([{"user_id": owner, "name": f"Owner {owner}"} for owner in owners])
+    ids = database.prescriptions.insert_many([
+        {
+            "user_id": owner, "doctor_name": "Dr Test", "date": "01-01-2025", "diagnosis": "test",
+            "created_at": datetime.utcnow(), "shared_with": [recipient],
+        }
+        for owner in owners
+    ]).inserted_ids
+    database.recieved_prescription.insert_one({"user_id": recipient, "prescription_id": [str(i) for i in ids]})
+
+
+def test_db_calls_do_not_grow_with_received_count(client, database, auth, db_queries):
+    queries = {}
+    for count in (1, 30):
+        recipient = f"recipient-{count}"
+        share_prescriptions(database, recipient, count)
+
+        response = client.get("/recievedPrescription", headers=auth(recipient))
+
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body) == count
+        assert all(item["owner_name"].startswith("Owner ") for item in body)
+        queries[count] = db_queries(response)
+
+    # Received list, prescriptions ($in) and owner profiles ($in)
+    assert queries == {1: 3, 30: 3}
@@ -0,0 +1,102 @@
+import threading
+import time
+from typing import Callable, Optional
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure, PyMongoError
+
+
+class CollectionWatcher:
+    """Call `on_change` in a background thread whenever a collection changes.
+
+    Uses a change stream when the deployment supports it (Atlas replica sets do)
+    and falls back to polling a cheap fingerprint otherwise: document count,
+    newest _id and the newest `version_field` value, so in-place edits are
+    seen as well as inserts and deletes. Writers must set `version_field`
+    (e.g. `updated_at`) on every update, and it should be indexed. Bursts of
+    changes are debounced into a single callback.
+    """
+
+    def __init__(
+        self,
+        collection: Collection,
+        on_change: Callable[[], None],
+        poll_interval: float = 300.0,
+        debounce: float = 2.0,
+        version_field: Optional[str] = "updated_at",
+    ):
+        self._collection = collection
+        self._on_change = on_change
+        self._poll_interval = poll_interval
+        self._debounce = debounce
+        self._version_field = version_field
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"watch-{self._collection.name}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _fire(self) -> None:
+        try:
+            self._on_change()
+        except Exception as e:
+            print(f"Error refreshing after change to {self._collection.name}: {e}")
+
+    def _run(self) -> None:
+        try:
+            self._watch()
+        except Exception as e:
+            # Standalone servers, some shared tiers and test doubles do not support change streams
+            print(f"Change streams unavailable for {self._collection.name} ({e}), polling instead")
+            self._poll()
+
+    def _watch(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with self._collection.watch(max_await_time_ms=1000) as stream:
+                    pending_since: Optional[float] = None
+                    while not self._stop.is_set() and stream.alive:
+                        if stream.try_next() is not None:
+                            pending_since = pending_since or time.monotonic()
+                        elif pending_since and time.monotonic() - pending_since >= self._debounce:
+                            pending_since = None
+                            self._fire()
+            except OperationFailure:
+                raise
+            except PyMongoError as e:
+                print(f"Change stream on {self._collection.name} interrupted: {e}")
+                self._stop.wait(self._poll_interval / 10)
+
+    def _fingerprint(self):
+        newest = self._collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        version = None
+        if self._version_field:
+            latest = self._collection.find_one(
+                {self._version_field: {"$exists": True}},
+                {"_id": 0, self._version_field: 1},
+                sort=[(self._version_field, -1)],
+            )
+            version = latest and latest[self._version_field]
+        return self._collection.estimated_document_count(), newest and newest["_id"], version
+
+    def _poll(self) -> None:
+        last = None
+        while not self._stop.is_set():
+            try:
+                current = self._fingerprint()
+                if last is not None and current != last:
+                    self._fire()
+                last = current
+            except PyMongoError as e:
+                print(f"Error polling {self._collection.name}: {e}")
+            self._stop.wait(self._poll_interval)
@@ -0,0 +1,155 @@
+import os
+import threading
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+from pymongo import monitoring
+
+# Commands slower than this are logged with their request context
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Thread-safe Prometheus-style histogram with a fixed label set"""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [count per bucket..., sum, count]
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in sorted(snapshot):
+            for bound, count in zip(self.buckets, series):
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+request_db_duration = Histogram(
+    "http_request_db_seconds", "Total MongoDB time spent per HTTP request", ("method", "route")
+)
+request_db_commands = Histogram(
+    "http_request_db_commands", "MongoDB commands issued per HTTP request", ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+)
+command_duration = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by collection", ("command", "collection")
+)
+
+
+class RequestStats:
+    """Database work attributed to one HTTP request"""
+
+    __slots__ = ("route", "commands", "db_ms", "slowest")
+
+    def __init__(self, route: str = ""):
+        self.route = route
+        self.commands = 0
+        self.db_ms = 0.0
+        self.slowest: Optional[Tuple[float, str, str]] = None  # (ms, command, collection)
+
+    def record(self, ms: float, command: str, collection: str) -> None:
+        self.commands += 1
+        self.db_ms += ms
+        if self.slowest is None or ms > self.slowest[0]:
+            self.slowest = (ms, command, collection)
+
+
+# Set by the HTTP middleware; copied into Mongo worker threads by repository.run_sync
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """pymongo command listener feeding the histograms and the current request's stats.
+
+    Callbacks run on the thread that issued the command, so the request
+    context is visible here.
+    """
+
+    def __init__(self):
+        self._collections: Dict[Tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else event.command.get("collection", "")
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = str(collection)
+
+    def _finished(self, event, failed: bool):
+        with self._lock:
+            collection = self._collections.pop((event.connection_id, event.request_id), "")
+        ms = event.duration_micros / 1000
+        command_duration.observe((event.command_name, collection), ms / 1000)
+
+        stats = current_request.get()
+        if stats is not None:
+            stats.record(ms, event.command_name, collection)
+        if ms >= SLOW_QUERY_MS:
+            route = stats.route if stats is not None else "-"
+            status = "failed" if failed else "ok"
+            print(f"🐢 Slow MongoDB {event.command_name} on {collection or '-'}: {ms:.1f}ms ({status}, route {route})")
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+
+command_listener = CommandMetrics()
+
+
+def render_gauges(name: str, help: str, kind: str, samples: Dict[str, float], label: str = "cache") -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for value_label, value in samples.items():
+        lines.append(f'{name}{{{label}="{_escape(value_label)}"}} {value}')
+    return lines
+
+
+def render(cache_stats: Dict[str, Dict[str, float]]) -> str:
+    """Prometheus text exposition of every histogram plus the given cache counters"""
+    lines: List[str] = []
+    for histogram in (request_duration, request_db_duration, request_db_commands, command_duration):
+        lines.extend(histogram.render())
+    lines.extend(render_gauges("cache_hits_total", "Cache hits", "counter", {n: s.get("hits", 0) for n, s in cache_stats.items()}))
+    lines.extend(render_gauges("cache_misses_total", "Cache misses", "counter", {n: s.get("misses", 0) for n, s in cache_stats.items()}))
+    lines.extend(render_gauges("cache_entries", "Entries currently cached", "gauge", {n: s.get("size", 0) for n, s in cache_stats.items()}))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort_value: datetime, _id: ObjectId) -> str:
+    """Opaque cursor for the position right after (sort_value, _id)"""
+    raw = json.dumps({"t": sort_value.isoformat(), "i": str(_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["t"]), ObjectId(data["i"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_query(
+    base: Dict[str, Any], field: str, cursor: Optional[str], descending: bool
+) -> Tuple[Dict[str, Any], List[Tuple[str, int]]]:
+    """Filter and sort for the page after `cursor`, ordered by (field, _id).
+
+    Every document needs `field` (see config/migrations.py for backfills).
+    With a matching compound index the whole page is a single index range
+    scan, no matter how deep the cursor is.
+    """
+    direction = -1 if descending else 1
+    sort = [(field, direction), ("_id", direction)]
+    if not cursor:
+        return base, sort
+
+    value, _id = decode_cursor(cursor)
+    op, bound = ("$lt", "$lte") if descending else ("$gt", "$gte")
+    after = {
+        # The plain bound lets the planner seek to `value` in the index;
+        # the $or then only settles ties on `field` by _id
+        field: {bound: value},
+        "$or": [{field: {op: value}}, {field: value, "_id": {op: _id}}],
+    }
+    return {"$and": [base, after]} if base else after, sort
+
+
+def paginate(docs: List[Dict[str, Any]], limit: int, field: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim a limit+1 fetch to one page and build the cursor for the next one"""
+    if len(docs) <= limit:
+        return docs, None
+    page = docs[:limit]
+    last = page[-1]
+    return page, encode_cursor(last[field], last["_id"])
@@ -0,0 +1,80 @@
+import os
+from typing import Any, Dict, Iterable, Optional
+from config import repository as repo
+from utils.cache import TTLCache
+
+# user_id -> profile document (None when the user has no profile). Shared by
+# auth, profile and sharing routes; every profile write goes through store()
+# or invalidate(), so within one process entries never go stale and the TTL
+# only bounds drift from writes made by other instances. The PROFILE_NAME_CACHE_*
+# names are the settings of the earlier name-only cache, still honoured.
+_profiles = TTLCache(
+    maxsize=int(os.getenv("PROFILE_CACHE_SIZE", os.getenv("PROFILE_NAME_CACHE_SIZE", "5000"))),
+    ttl=float(os.getenv("PROFILE_CACHE_TTL", os.getenv("PROFILE_NAME_CACHE_TTL", "300"))),
+)
+# "No profile" is only cached briefly, so a profile created through another
+# instance shows up here within seconds rather than after the full TTL
+MISS_TTL = float(os.getenv("PROFILE_CACHE_MISS_TTL", "5"))
+_MISSING = object()
+_writes = {"stores": 0, "invalidations": 0}
+
+
+def _remember(user_id: str, profile: Optional[Dict[str, Any]]) -> None:
+    _profiles.set(user_id, profile, ttl=None if profile is not None else MISS_TTL)
+
+
+async def get_profile(user_id: str) -> Optional[Dict[str, Any]]:
+    """Profile for user_id, read through the cache. Treat the result as read-only."""
+    profile = _profiles.get(user_id, _MISSING)
+    if profile is _MISSING:
+        profile = await repo.profiles.find_one({"user_id": user_id})
+        _remember(user_id, profile)
+    return profile
+
+
+def get_profile_if_cached(user_id: str) -> Optional[Dict[str, Any]]:
+    """Cached profile for user_id, without falling back to MongoDB"""
+    profile = _profiles.get(user_id, _MISSING)
+    return None if profile is _MISSING else profile
+
+
+async def get_profiles(user_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Map user_ids to profiles with at most one $in query for the cache misses"""
+    profiles: Dict[str, Optional[Dict[str, Any]]] = {}
+    missing = []
+    for uid in dict.fromkeys(user_ids):
+        profile = _profiles.get(uid, _MISSING)
+        if profile is _MISSING:
+            missing.append(uid)
+        else:
+            profiles[uid] = profile
+
+    if missing:
+        found = {p["user_id"]: p for p in await repo.profiles.find({"user_id": {"$in": missing}})}
+        for uid in missing:
+            profiles[uid] = found.get(uid)
+            _remember(uid, profiles[uid])
+
+    return profiles
+
+
+async def resolve_names(user_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Map user_ids to display names (None when the user has no profile)"""
+    profiles = await get_profiles(user_ids)
+    return {uid: profile.get("name") if profile else None for uid, profile in profiles.items()}
+
+
+def store(profile: Dict[str, Any]) -> None:
+    """Write-through after a profile is created or updated"""
+    _writes["stores"] += 1
+    _profiles.set(profile["user_id"], profile)
+
+
+def invalidate(user_id: str) -> None:
+    """Drop a cached profile, e.g. after it is deleted"""
+    _writes["invalidations"] += 1
+    _profiles.pop(user_id)
+
+
+def stats() -> Dict[str, Any]:
+    return {**_profiles.stats(), **_writes}